@@ -1,17 +1,24 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 
 def create_app() -> FastAPI:
     """Application factory."""
-    app = FastAPI()
+    app = FastAPI(default_response_class=ORJSONResponse)
 
     register_routers(app)
+    register_middleware(app)
+    register_tasks(app)
 
     return app
 
 
 def register_routers(app: FastAPI):
     """Register api routers."""
+    from config import settings
+    if settings.async_database:
+        register_async_routers(app)
+
     from .resources.follows import follows
     app.include_router(follows)
 
@@ -23,3 +30,84 @@ def register_routers(app: FastAPI):
 
     from .resources.posts import posts
     app.include_router(posts)
+
+    from .resources.exports import exports
+    app.include_router(exports)
+
+    if settings.use_metrics:
+        from .resources.metrics import metrics
+        app.include_router(metrics)
+
+
+def register_middleware(app: FastAPI):
+    """Register middleware."""
+    from .database import ReadYourWritesMiddleware, replicas
+    from config import settings
+    if replicas:
+        app.add_middleware(ReadYourWritesMiddleware)
+
+    if settings.rate_limiting:
+        from .ratelimit import RateLimitMiddleware
+        app.add_middleware(RateLimitMiddleware)
+
+    if settings.sql_profiling:
+        from .profiling import ProfilingMiddleware
+        app.add_middleware(ProfilingMiddleware)
+
+    if settings.use_metrics:
+        from .metrics import MetricsMiddleware
+        app.add_middleware(MetricsMiddleware)
+
+
+def register_async_routers(app: FastAPI):
+    """Register asyncio versions of read routes.
+
+    They are registered before the sync routers, so they take precedence
+    for matching paths while writes are still served by sync routes.
+    """
+    from .resources.follows import async_follows
+    app.include_router(async_follows)
+
+    from .resources.users import async_users
+    app.include_router(async_users)
+
+    from .resources.posts import async_posts
+    app.include_router(async_posts)
+
+
+def register_tasks(app: FastAPI):
+    """Register background tasks."""
+    from .database import SessionLocal
+    from .models import Timeline, Token, last_seen_buffer
+    from .tasks import PeriodicTask
+    from config import settings
+
+    def flush_last_seen():
+        with SessionLocal() as db:
+            return last_seen_buffer.flush(db)
+
+    def sweep_tokens():
+        with SessionLocal() as db:
+            return Token.clean(db, settings.token_sweep_batch_size)
+
+    def trim_timelines():
+        with SessionLocal() as db:
+            return Timeline.truncate(db)
+
+    app.state.tasks = [
+        PeriodicTask(settings.last_seen_flush_interval, flush_last_seen),
+        PeriodicTask(settings.token_sweep_interval, sweep_tokens),
+        PeriodicTask(settings.feed_trim_interval, trim_timelines),
+    ]
+    if settings.rate_limiting and settings.rate_limit_backend == "database":
+        from .ratelimit import DatabaseStore, rate_limits
+
+        def sweep_rate_limits():
+            idle = max((limit.refill_time for limit in rate_limits().values()), default=0)
+            with SessionLocal() as db:
+                return DatabaseStore.clean(db, idle)
+
+        app.state.tasks.append(PeriodicTask(settings.rate_limit_sweep_interval, sweep_rate_limits))
+    for task in app.state.tasks:
+        app.add_event_handler("startup", task.start)
+        app.add_event_handler("shutdown", task.stop)
@@ -0,0 +1,48 @@
+from threading import Lock
+
+import sqlalchemy as sqla
+import sqlalchemy.orm as sqla_orm
+
+
+class WriteBehindBuffer:
+    """Collect column values per row in memory and write them in one bulk UPDATE.
+
+    Values recorded for the same row between flushes are coalesced, the last one wins.
+    """
+
+    def __init__(self, key: sqla.Column, column: sqla.Column):
+        self.key = key
+        self.column = column
+        self._pending = {}
+        self._lock = Lock()
+
+    def record(self, key, value):
+        """Remember value to be written for row with given key."""
+        with self._lock:
+            self._pending[key] = value
+
+    def flush(self, db: sqla_orm.Session) -> int:
+        """Write pending values and return number of updated rows.
+
+        If writing fails, values are put back to be retried by next flush,
+        unless newer ones were recorded in the meantime, and error is raised.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        statement = sqla.update(self.key.table) \
+            .where(self.key == sqla.bindparam("_key")) \
+            .values({self.column.name: sqla.bindparam("_value")})
+        try:
+            db.execute(statement, [{"_key": key, "_value": value} for key, value in pending.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._pending = {**pending, **self._pending}
+            raise
+        return len(pending)
+
+    def __len__(self):
+        return len(self._pending)
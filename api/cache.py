@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+import time
+
+
+class TTLCache:
+    """Bounded LRU cache with per entry time to live, safe to share between threads."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """Return cached value or default if key is missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def peek(self, key, default=None):
+        """Return cached value like 'get', without counting a lookup or refreshing recency."""
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            return default
+        return item[1]
+
+    def set(self, key, value, ttl: Optional[float] = None):
+        """Cache value, evicting least recently used entries over maxsize."""
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        """Invalidate cached value."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Invalidate all cached values and reset counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+
+class ExpiringSet:
+    """Set of keys forgotten after their expiration time, safe to share between threads."""
+
+    def __init__(self, prune_interval: float = 60):
+        self.prune_interval = prune_interval
+        self._data = {}
+        self._lock = Lock()
+        self._next_prune = 0
+
+    def add(self, key, expires: float):
+        """Add key until 'expires' unix timestamp."""
+        now = time.time()
+        with self._lock:
+            self._data[key] = expires
+            if now >= self._next_prune:
+                self._data = {key: expires for key, expires in self._data.items() if expires > now}
+                self._next_prune = now + self.prune_interval
+
+    def __contains__(self, key) -> bool:
+        expires = self._data.get(key)
+        return expires is not None and expires > time.time()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from .security import read_access_token
+from config import settings
+
+
+def token_user_id(access_token: str) -> Optional[int]:
+    """Return id of user owning access token, if it is known without a database query."""
+    from .models import token_cache
+
+    if settings.signed_access_tokens:
+        claims = read_access_token(access_token)
+        return claims.user_id if claims else None
+    cached = token_cache.peek(access_token)
+    return cached[0] if cached else None
+
+
+def client_key(scope) -> str:
+    """Identify client by user id of its access token, or by address.
+
+    Tokens not seen by this process yet are keyed by address until they are
+    verified once, so that made up tokens can't be used to dodge limits.
+    """
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    scheme, _, access_token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and access_token:
+        user_id = token_user_id(access_token)
+        if user_id is not None:
+            return f"user:{user_id}"
+    return address_key(scope)
+
+
+def address_key(scope) -> str:
+    """Identify client by its address."""
+    return f"ip:{scope['client'][0] if scope.get('client') else ''}"
@@ -0,0 +1,25 @@
+from typing import Optional
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*values) -> str:
+    """Build strong entity tag out of values that identify a representation version."""
+    return '"%s"' % hashlib.sha1(repr(values).encode("utf-8")).hexdigest()
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set ETag header and return 304 response if client already has this version.
+
+    Views return this response as is, so the body is never built for unchanged
+    resources. If-None-Match uses weak comparison, as required by RFC 7232.
+    """
+    response.headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
@@ -1,13 +1,174 @@
-from sqlalchemy import create_engine
+from itertools import count
+from time import monotonic, perf_counter
+import logging
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
+from .cache import TTLCache
+from .clients import address_key, client_key
 from config import settings
 
-engine = create_engine(settings.database_url)
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+class CheckoutTimer:
+    """Pool mixin keeping track of time spent waiting for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = perf_counter() - start
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def stats(self) -> dict:
+        """Return pool usage and checkout wait time in milliseconds."""
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": self.checkouts,
+            "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+class TimedQueuePool(CheckoutTimer, QueuePool):
+    """Queue pool reporting checkout wait time."""
+
+
+class TimedAsyncQueuePool(CheckoutTimer, AsyncAdaptedQueuePool):
+    """Asyncio queue pool reporting checkout wait time."""
+
+
+def is_sqlite(url: str) -> bool:
+    """Check if database url points to SQLite."""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str, poolclass) -> dict:
+    """Return pool arguments for engine of database url.
+
+    In-memory SQLite databases keep their single connection pool.
+    """
+    if is_sqlite(url) and make_url(url).database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply configured pragmas to every new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}")
+    cursor.close()
+
+
+def make_engine(url: str):
+    """Create engine with configured pool, applying pragmas to SQLite connections."""
+    # FastAPI may open and close a sync session in different threadpool threads.
+    connect_args = {"check_same_thread": False} if is_sqlite(url) else {}
+    engine = create_engine(url, connect_args=connect_args, **engine_options(url, TimedQueuePool))
+    if is_sqlite(url):
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+class ReplicaSet:
+    """Round-robin choice of read replica engines.
+
+    A replica that fails to connect is skipped for 'retry_interval' seconds.
+    """
+
+    def __init__(self, engines: list, retry_interval: float):
+        self.engines = engines
+        self.retry_interval = retry_interval
+        self._down_until = [0.0] * len(engines)
+        self._counter = count()
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def connect(self):
+        """Return connection to the next healthy replica, None if all are down."""
+        for _ in range(len(self.engines)):
+            index = next(self._counter) % len(self.engines)
+            if self._down_until[index] > monotonic():
+                continue
+            try:
+                return self.engines[index].connect()
+            except exc.DBAPIError:
+                logger.warning("Replica %s is unavailable", self.engines[index].url, exc_info=True)
+                self._down_until[index] = monotonic() + self.retry_interval
+        return None
+
+
+engine = make_engine(settings.database_url)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+replicas = ReplicaSet([make_engine(url) for url in settings.database_replica_urls], settings.replica_retry_interval)
+# Clients that wrote recently, their reads go to primary until replicas catch up.
+recent_writers = TTLCache(settings.read_your_writes_size, settings.read_your_writes_window)
+
+
+def async_database_url(url: str) -> str:
+    """Swap driver of database url for its asyncio counterpart."""
+    url = make_url(url)
+    return str(url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()]))
+
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_database:
+    url = settings.async_database_url or async_database_url(settings.database_url)
+    # aiosqlite runs every connection in its own non-daemon thread, pooled
+    # connections would keep the process alive, so SQLite keeps the default pool.
+    async_engine = create_async_engine(url, **({} if is_sqlite(url) else engine_options(url, TimedAsyncQueuePool)))
+    if is_sqlite(url):
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+    AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+def pool_stats() -> dict:
+    """Return connection pool usage of sync and asyncio engines."""
+    stats = {}
+    pools = [("sync", engine.pool), ("async", async_engine and async_engine.sync_engine.pool)]
+    pools += [(f"replica{i}", replica.pool) for i, replica in enumerate(replicas.engines)]
+    for name, pool in pools:
+        if isinstance(pool, CheckoutTimer):
+            stats[name] = pool.stats()
+    return stats
+
 
 def get_db():
     """Retrieve database connection."""
@@ -16,4 +177,58 @@ def get_db():
         yield db 
     finally:
         db.close()
-        
\ No newline at end of file
+
+
+def wrote_recently(scope) -> bool:
+    """Tell if client of request had an unsafe request succeed in the last 'read_your_writes_window' seconds.
+
+    Writes are remembered by user id when it is known, and by address
+    otherwise. Registration and login are anonymous, so address is checked
+    too, for reads made with the token that was just issued.
+    """
+    return any(recent_writers.get(key) is not None for key in {client_key(scope), address_key(scope)})
+
+
+def get_read_db(request: Request, db=Depends(get_db)):
+    """Retrieve database connection for read-only routes.
+
+    Connection is made to a read replica, unless there is none, all of them
+    are down or the client wrote in the last 'read_your_writes_window'
+    seconds. Otherwise primary session 'db' is used.
+    """
+    connection = None
+    if replicas and not wrote_recently(request.scope):
+        connection = replicas.connect()
+    if connection is None:
+        yield db
+        return
+    replica_db = SessionLocal(bind=connection)
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+        connection.close()
+
+
+class ReadYourWritesMiddleware:
+    """Remember clients whose unsafe requests succeeded, see 'get_read_db'."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in ("GET", "HEAD", "OPTIONS"):
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                recent_writers.set(client_key(scope), True)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def get_async_db():
+    """Retrieve asyncio database connection."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -41,3 +41,15 @@ class Conflict(HTTPException):
     """409 Conflict. Error type - http."""
     def __init__(self, message: str = "Conflict"):
         super().__init__(status_code=409, detail=message)
+
+
+class TooManyRequests(HTTPException):
+    """429 Too Many Requests. Error type - http."""
+    def __init__(self, message: str = "Too many requests, try again later", retry_after: int = 1):
+        super().__init__(status_code=429, detail=message, headers={"Retry-After": str(retry_after)})
+
+
+class ServiceUnavailable(HTTPException):
+    """503 Service Unavailable. Error type - http."""
+    def __init__(self, message: str = "Service Unavailable"):
+        super().__init__(status_code=503, detail=message)
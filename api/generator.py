@@ -0,0 +1,160 @@
+from bisect import bisect
+from datetime import datetime, timedelta
+from itertools import accumulate
+from math import log
+from typing import Iterator
+import base64
+import random
+
+from .importer import Importer
+from .models import Post, Token, User, followers
+from .security import generate_password_hash
+from config import settings
+
+WORDS = (
+    "the of and to in is that it for on was with as be at by this had not are but from or have an they which one "
+    "you were all we when there can more if out so up said what its about into than them only other new some "
+    "time could these two may first then do any like my now over such our man me even most made after also did "
+    "many before must through back years where much your way well down should because each just those people "
+    "how too little state good very make world still own see men work long get here between both life being "
+    "under never day same another know while last might us great old year off come since against go came right "
+    "used take three blog post python code api database query cache server request user follow feed timeline "
+    "release deploy latency index page token async sqlite postgres fastapi weekend coffee travel music photo"
+).split()
+
+MAX_TEXT_SIZE = 20000
+
+
+def zipf_weights(n: int, exponent: float) -> list:
+    """Return cumulative weights of ranks 1 to n under Zipf's law."""
+    return list(accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+
+class DatasetGenerator:
+    """Deterministic synthetic dataset of users, posts, follow edges and tokens.
+
+    Followers and posts per user follow Zipf's law with given 'exponent',
+    so that a few users are followed by, and post far more than, everybody
+    else. Follows per user and post sizes are log-normal, posts get
+    increasing ids and timestamps spread over 'days' before 'end', denser
+    towards the end as the site grows. Same seed gives same rows.
+    """
+
+    def __init__(self, users: int, posts: int, follows_per_user: int = 20, tokens: int = 0, days: int = 365,
+                 seed: int = 0, exponent: float = 1.1, end: datetime = None):
+        self.users = users
+        self.posts = posts
+        self.follows_per_user = follows_per_user
+        self.tokens = min(tokens, users)
+        self.days = days
+        self.seed = seed
+        self.exponent = exponent
+        # Midnight by default, so that generating twice on a day gives same rows.
+        self.end = end or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start = self.end - timedelta(days=days)
+        self._weights = zipf_weights(users, exponent)
+        rng = self.random_for("corpus")
+        self._corpus = " ".join(rng.choices(WORDS, cum_weights=zipf_weights(len(WORDS), 1.0), k=200000))
+
+    def random_for(self, name: str) -> random.Random:
+        """Return random generator of one kind of rows, independent of the others."""
+        return random.Random(f"{self.seed}:{name}")
+
+    def ranking(self, name: str) -> list:
+        """Return user ids in random order, first ones being most popular."""
+        ids = list(range(1, self.users + 1))
+        self.random_for(name).shuffle(ids)
+        return ids
+
+    def pick(self, rng: random.Random, ranking: list) -> int:
+        """Pick user id, more popular ones more often."""
+        return ranking[bisect(self._weights, rng.random() * self._weights[-1], hi=self.users - 1)]
+
+    def text(self, rng: random.Random, median_words: float) -> str:
+        """Return slice of corpus with log-normally distributed number of words."""
+        size = max(1, int(rng.lognormvariate(log(median_words * 6), 0.8)))
+        size = min(size, MAX_TEXT_SIZE)
+        start = self._corpus.find(" ", rng.randrange(len(self._corpus) - size)) + 1
+        end = self._corpus.find(" ", start + size)
+        return self._corpus[start:end if end != -1 else None]
+
+    def user_rows(self) -> Iterator[dict]:
+        """Generate users, all with password 'password'."""
+        rng = self.random_for("users")
+        password_hash = generate_password_hash("password")
+        span = self.days * 86400
+        for user_id in range(1, self.users + 1):
+            member_since = self.start + timedelta(seconds=span * rng.random() ** 0.5)
+            last_seen = member_since + timedelta(seconds=(self.end - member_since).total_seconds() * rng.random())
+            yield {
+                "user_id": user_id,
+                "username": f"user{user_id}",
+                "email": f"user{user_id}@example.com",
+                "password_hash": password_hash,
+                "about_me": self.text(rng, 15) if rng.random() < 0.5 else "",
+                "member_since": member_since,
+                "last_seen": last_seen,
+                "updated_at": last_seen,
+            }
+
+    def post_rows(self) -> Iterator[dict]:
+        """Generate posts in order of creation time."""
+        rng = self.random_for("posts")
+        ranking = self.ranking("authors")
+        span = self.days * 86400
+        for post_id in range(1, self.posts + 1):
+            # Square root of uniform values has density growing linearly with time.
+            created_at = self.start + timedelta(seconds=span * ((post_id - 1 + rng.random()) / self.posts) ** 0.5)
+            title = self.text(rng, 5)[:50].rstrip()
+            yield {
+                "post_id": post_id,
+                "title": title[:1].upper() + title[1:],
+                "content": self.text(rng, 60),
+                "author_id": self.pick(rng, ranking),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def follow_rows(self) -> Iterator[dict]:
+        """Generate follow edges, followed users picked by popularity."""
+        rng = self.random_for("follows")
+        ranking = self.ranking("followers")
+        if not self.follows_per_user:
+            return
+        # Log-normal with mean 'follows_per_user'.
+        sigma = 1.0
+        mu = log(self.follows_per_user) - sigma ** 2 / 2
+        for follower_id in range(1, self.users + 1):
+            count = min(int(rng.lognormvariate(mu, sigma)), self.users - 1)
+            followed = set()
+            for _ in range(count * 4):
+                if len(followed) >= count:
+                    break
+                user_id = self.pick(rng, ranking)
+                if user_id != follower_id:
+                    followed.add(user_id)
+            for followed_id in sorted(followed):
+                yield {"follower_id": follower_id, "followed_id": followed_id}
+
+    def token_rows(self) -> Iterator[dict]:
+        """Generate one token for each of the first 'tokens' users, valid for a day after 'end'."""
+        rng = self.random_for("tokens")
+        for user_id in range(1, self.tokens + 1):
+            yield {
+                "user_id": user_id,
+                "access_token": base64.urlsafe_b64encode(rng.randbytes(32)).decode().rstrip("="),
+                "access_expiration": self.end + timedelta(days=1),
+                "refresh_token": base64.urlsafe_b64encode(rng.randbytes(32)).decode().rstrip("="),
+                "refresh_expiration": self.end + timedelta(days=settings.refresh_token_expire_days + 1),
+            }
+
+    def load(self, importer: Importer) -> dict:
+        """Insert generated rows with importer, return number of rows per table."""
+        counts = {
+            "users": importer.insert("users", User.__table__, self.user_rows(), list),
+            "posts": importer.insert("posts", Post.__table__, self.post_rows(), list),
+            "follows": importer.insert("follows", followers, self.follow_rows(), list),
+            "tokens": importer.insert("tokens", Token.__table__, self.token_rows(), list),
+        }
+        importer.finish()
+        return counts
@@ -0,0 +1,149 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Optional
+import csv
+import json
+import multiprocessing
+
+import sqlalchemy as sqla
+import sqlalchemy.orm as sqla_orm
+
+from .models import Post, PostSearch, Timeline, User, followers
+from .security import get_hasher
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Read records from CSV file if path ends with '.csv', from NDJSON file otherwise."""
+    with open(path, newline="", encoding="utf-8") as file:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batches(records: Iterable, size: int) -> Iterator[list]:
+    """Split records into lists of at most 'size' items."""
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    """Parse ISO 8601 time, empty values are left for column defaults."""
+    return datetime.fromisoformat(value) if value else None
+
+
+def with_id(row: dict, record: dict, key: str) -> dict:
+    """Keep id of imported record, if it has one."""
+    if record.get(key):
+        row[key] = int(record[key])
+    return row
+
+
+class Importer:
+    """Bulk loader of users, posts and follow edges.
+
+    Rows are inserted with executemany, 'batch_size' rows per transaction.
+    Raw passwords are hashed a batch at a time on a pool of 'workers'
+    processes, or in the calling process if workers is 0. Ids given in
+    records are kept, so that posts and follows can refer to imported users.
+    """
+
+    def __init__(self, db: sqla_orm.Session, batch_size: int = 5000, workers: int = 0,
+                 progress: Optional[Callable[[str, int, float], None]] = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.workers = workers
+        self.progress = progress
+        self._pool = None
+
+    def __enter__(self):
+        if self.workers:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def hash_passwords(self, passwords: list) -> list:
+        """Hash batch of raw passwords with configured hasher."""
+        hasher = get_hasher()
+        if self._pool is None:
+            return [hasher.hash(password) for password in passwords]
+        return list(self._pool.map(hasher.hash, passwords, chunksize=max(1, len(passwords) // (self.workers * 4))))
+
+    def insert(self, name: str, table, rows: Iterable[dict], prepare: Callable[[list], list]) -> int:
+        """Insert rows in batches, return number of inserted rows."""
+        count = 0
+        start = perf_counter()
+        for batch in batches(rows, self.batch_size):
+            self.db.execute(sqla.insert(table), prepare(batch))
+            self.db.commit()
+            count += len(batch)
+            if self.progress:
+                self.progress(name, count, perf_counter() - start)
+        return count
+
+    def prepare_users(self, records: list) -> list:
+        """Build users rows, hashing raw passwords of records without 'password_hash'."""
+        passwords = [record["password"] for record in records if not record.get("password_hash")]
+        hashes = iter(self.hash_passwords(passwords))
+        now = datetime.utcnow()
+        return [with_id({
+            "username": record["username"],
+            "email": record["email"],
+            "password_hash": record.get("password_hash") or next(hashes),
+            "about_me": record.get("about_me") or "",
+            "member_since": parse_datetime(record.get("member_since")) or now,
+            "last_seen": parse_datetime(record.get("last_seen")) or now,
+            "updated_at": now,
+        }, record, "user_id") for record in records]
+
+    def prepare_posts(self, records: list) -> list:
+        """Build posts rows."""
+        now = datetime.utcnow()
+        return [with_id({
+            "title": record["title"],
+            "content": record["content"],
+            "author_id": int(record["author_id"]),
+            "created_at": parse_datetime(record.get("created_at")) or now,
+            "updated_at": now,
+        }, record, "post_id") for record in records]
+
+    def prepare_follows(self, records: list) -> list:
+        """Build followers rows."""
+        return [{"follower_id": int(record["follower_id"]), "followed_id": int(record["followed_id"])}
+                for record in records]
+
+    def import_users(self, records: Iterable[dict]) -> int:
+        """Import users, records need 'username', 'email' and 'password' or 'password_hash'."""
+        return self.insert("users", User.__table__, records, self.prepare_users)
+
+    def import_posts(self, records: Iterable[dict]) -> int:
+        """Import posts, records need 'title', 'content' and 'author_id'."""
+        return self.insert("posts", Post.__table__, records, self.prepare_posts)
+
+    def import_follows(self, records: Iterable[dict]) -> int:
+        """Import follow edges, records need 'follower_id' and 'followed_id'."""
+        return self.insert("follows", followers, records, self.prepare_follows)
+
+    def finish(self):
+        """Bring derived data up to date with imported rows.
+
+        Recomputes counters, rebuilds search index, delivers recent posts to
+        timelines and moves Postgres id sequences past imported ids.
+        """
+        User.reconcile_counters(self.db, self.batch_size)
+        PostSearch.rebuild(self.db)
+        Timeline.backfill_all(self.db)
+        if PostSearch.dialect(self.db) == "postgresql":
+            for table, column in (("users", "user_id"), ("posts", "post_id")):
+                self.db.execute(sqla.text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), coalesce(max({column}), 1)) FROM {table}"))
+        self.db.commit()
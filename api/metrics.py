@@ -0,0 +1,190 @@
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Statements executed while handling current request, shared with the
+# threadpool threads sync routes run in, as they copy the request context.
+request_statements: ContextVar[Optional[list]] = ContextVar("request_statements", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    """Count statement against request being handled, if any."""
+    counter = request_statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class Histogram:
+    """Labelled histogram with fixed buckets.
+
+    Observations are only made from the event loop thread, so no locking
+    is needed.
+    """
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = defaultdict(lambda: [0] * (len(buckets) + 1))
+        self.sums = defaultdict(float)
+
+    def observe(self, labels: tuple, value: float):
+        """Record value under labels."""
+        self.counts[labels][bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def clear(self):
+        """Forget all observations."""
+        self.counts.clear()
+        self.sums.clear()
+
+
+class Metrics:
+    """Request metrics collected by 'MetricsMiddleware'."""
+
+    def __init__(self):
+        self.in_progress = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.responses = defaultdict(int)
+
+    def clear(self):
+        """Reset all metrics."""
+        self.in_progress = 0
+        self.latency.clear()
+        self.statements.clear()
+        self.responses.clear()
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    """Measure latency, response status and SQL statements of every request.
+
+    Requests are labelled with method and path template of matched route,
+    so that path parameters don't create new series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        counter = [0]
+        token = request_statements.set(counter)
+        metrics.in_progress += 1
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            metrics.in_progress -= 1
+            request_statements.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path_format if route is not None else "unmatched")
+            metrics.latency.observe(labels, elapsed)
+            metrics.statements.observe(labels, counter[0])
+            metrics.responses[labels + (str(status),)] += 1
+
+
+def escape(value: str) -> str:
+    """Escape label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    """Format label set, empty if there are no labels."""
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def format_bound(bound: float) -> str:
+    """Format bucket bound the way Prometheus client libraries do."""
+    return str(float(bound))
+
+
+def render_histogram(name: str, help: str, histogram: Histogram, names: tuple) -> list:
+    """Render histogram in Prometheus text format."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for labels, counts in sorted(histogram.counts.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ("+Inf",), counts):
+            cumulative += count
+            le = bound if bound == "+Inf" else format_bound(bound)
+            lines.append(f"{name}_bucket{format_labels(names + ('le',), labels + (le,))} {cumulative}")
+        lines.append(f"{name}_sum{format_labels(names, labels)} {histogram.sums[labels]}")
+        lines.append(f"{name}_count{format_labels(names, labels)} {cumulative}")
+    return lines
+
+
+def render_samples(name: str, help: str, kind: str, samples: dict, names: tuple = ()) -> list:
+    """Render gauge or counter samples keyed by label values."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{format_labels(names, labels)} {value}")
+    return lines
+
+
+def caches() -> dict:
+    """Return caches of the application by name."""
+    from .database import recent_writers
+    from .models import token_cache
+    from .pagination import table_counts
+    return {"token": token_cache, "recent_writers": recent_writers, "table_counts": table_counts}
+
+
+def render() -> str:
+    """Render all metrics in Prometheus text exposition format.
+
+    Pool and cache metrics are read at scrape time, nothing is recorded for
+    them on the hot path.
+    """
+    from .database import pool_stats
+
+    pools = pool_stats()
+    cache_stats = {name: cache.stats() for name, cache in caches().items()}
+    route = ("method", "route")
+    lines = []
+    lines += render_samples("http_requests_in_progress", "Requests being handled.", "gauge",
+                            {(): metrics.in_progress})
+    lines += render_samples("http_responses_total", "Responses by status code.", "counter",
+                            metrics.responses, route + ("status",))
+    lines += render_histogram("http_request_duration_seconds", "Request latency.", metrics.latency, route)
+    lines += render_histogram("http_request_sql_statements", "SQL statements executed per request.",
+                              metrics.statements, route)
+    for key, help in (("size", "Connections kept in pool."),
+                      ("checked_out", "Connections checked out of pool."),
+                      ("overflow", "Connections opened over pool size.")):
+        lines += render_samples(f"db_pool_{key}", help, "gauge",
+                                {(pool,): stats[key] for pool, stats in pools.items()}, ("pool",))
+    lines += render_samples("db_pool_checkouts_total", "Connection checkouts.", "counter",
+                            {(pool,): stats["checkouts"] for pool, stats in pools.items()}, ("pool",))
+    lines += render_samples("db_pool_checkout_wait_max_seconds", "Longest wait for a connection.", "gauge",
+                            {(pool,): stats["wait_max_ms"] / 1000 for pool, stats in pools.items()}, ("pool",))
+    for key, kind, help in (("hits", "counter", "Cache hits."),
+                            ("misses", "counter", "Cache misses."),
+                            ("size", "gauge", "Entries in cache."),
+                            ("hit_ratio", "gauge", "Ratio of lookups served from cache.")):
+        name = f"cache_{key}_total" if kind == "counter" else f"cache_{key}"
+        lines += render_samples(name, help, kind,
+                                {(cache,): stats[key] for cache, stats in cache_stats.items()}, ("cache",))
+    return "\n".join(lines) + "\n"
@@ -1,19 +1,47 @@
 from typing import Optional
+from calendar import timegm
 from datetime import datetime, timedelta
+import re
 import secrets
 
 from fastapi import Cookie, Depends
 from fastapi.security.oauth2 import OAuth2PasswordBearer
 import sqlalchemy as sqla
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 import sqlalchemy.orm as sqla_orm
 
 from . import errors, schemas
-from .database import get_db, Base
-from .security import check_password_hash, generate_password_hash
+from .buffers import WriteBehindBuffer
+from .cache import ExpiringSet, TTLCache
+from .conditional import make_etag
+from .database import get_async_db, get_db, Base
+from .pagination import paginate
+from .security import (check_password_hash, generate_password_hash, password_needs_rehash,
+                       read_access_token, sign_access_token)
 from config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="tokens")
 
+# access_token -> (user_id, access_expiration). Expired tokens are evicted by
+# Token.expire() in this process only, so keep the ttl short when running
+# several workers.
+token_cache = TTLCache(settings.token_cache_size, settings.token_cache_ttl)
+
+# Ids of revoked signed access tokens, kept until the token would expire anyway.
+# Like token_cache it is per process, so revocation is not seen by other workers.
+revoked_access_tokens = ExpiringSet()
+
+
+class RateLimit(Base):
+    """SQLAlchemy model to represent 'rate_limits' table, see 'ratelimit.DatabaseStore'."""
+    __tablename__ = "rate_limits"
+
+    bucket = sqla.Column(sqla.String(128), primary_key=True)
+    tokens = sqla.Column(sqla.Float, nullable=False)
+    updated_at = sqla.Column(sqla.Float, nullable=False, index=True)
+    allowed = sqla.Column(sqla.Boolean, nullable=False)
+
 
 class Updatable:
     def update(self, data: dict):
@@ -25,8 +53,10 @@ class Updatable:
 followers = sqla.Table(
     "followers",
     Base.metadata,
-    sqla.Column("followed_id", sqla.Integer, sqla.ForeignKey("users.user_id")),
-    sqla.Column("follower_id", sqla.Integer, sqla.ForeignKey("users.user_id"))
+    sqla.Column("followed_id", sqla.Integer, sqla.ForeignKey("users.user_id"), nullable=False),
+    sqla.Column("follower_id", sqla.Integer, sqla.ForeignKey("users.user_id"), nullable=False),
+    sqla.PrimaryKeyConstraint("follower_id", "followed_id"),
+    sqla.Index("ix_followers_followed_id_follower_id", "followed_id", "follower_id")
 )
 
 
@@ -38,14 +68,18 @@ class Token(Base):
     access_token = sqla.Column(sqla.String(64), nullable=False, index=True)
     access_expiration = sqla.Column(sqla.DateTime)
     refresh_token = sqla.Column(sqla.String(64), nullable=False, index=True)
-    refresh_expiration = sqla.Column(sqla.DateTime)
+    refresh_expiration = sqla.Column(sqla.DateTime, index=True)
     user_id = sqla.Column(sqla.Integer, sqla.ForeignKey("users.user_id"))
 
     def generate(self):
         """Generate access and refresh token pair."""
-        self.access_token = secrets.token_urlsafe()
         self.access_expiration = datetime.utcnow() + \
             timedelta(minutes=settings.access_token_expire_minutes)
+        if settings.signed_access_tokens:
+            self.access_expiration = self.access_expiration.replace(microsecond=0)
+            self.access_token = sign_access_token(self.user.user_id, self.access_expiration)
+        else:
+            self.access_token = secrets.token_urlsafe()
         self.refresh_token = secrets.token_urlsafe() 
         self.refresh_expiration = datetime.utcnow() + \
             timedelta(days=settings.refresh_token_expire_days)
@@ -54,22 +88,51 @@ class Token(Base):
         """Expire token."""
         self.access_expiration = datetime.utcnow()
         self.refresh_expiration = datetime.utcnow()
+        token_cache.pop(self.access_token)
+        claims = read_access_token(self.access_token) if settings.signed_access_tokens else None
+        if claims is not None:
+            revoked_access_tokens.add(claims.token_id, timegm(claims.expiration.utctimetuple()))
+
+    @staticmethod
+    def read_signed(access_token: str) -> tuple:
+        """Return user id and expiration of signed access token without database lookup."""
+        claims = read_access_token(access_token)
+        if claims is None or claims.token_id in revoked_access_tokens:
+            raise errors.Unauthorized
+        return claims.user_id, claims.expiration
 
     @staticmethod
-    def clean(db: sqla_orm.Session):
-        """Revoke all tokens that expired for more than one day."""
+    def clean(db: sqla_orm.Session, batch_size: int = 1000) -> int:
+        """Revoke all tokens that expired for more than one day.
+
+        Tokens are deleted in batches, each in its own transaction, to keep
+        locks short. Return number of deleted tokens.
+        """
         yesterday = datetime.utcnow() - timedelta(days=1)
-        db.query(Token).filter(Token.refresh_expiration < yesterday).delete()
+        expired = sqla.select(Token.token_id).where(Token.refresh_expiration < yesterday).limit(batch_size)
+        deleted = 0
+        while True:
+            result = db.execute(sqla.delete(Token).where(Token.token_id.in_(expired))
+                                .execution_options(synchronize_session=False))
+            db.commit()
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                return deleted
 
 
 class Post(Updatable, Base):
     """SQLAlchemy model to represent 'posts' table."""
     __tablename__ = "posts"
+    __table_args__ = (
+        sqla.Index("ix_posts_created_at_post_id", "created_at", "post_id"),
+        sqla.Index("ix_posts_author_id_created_at_post_id", "author_id", "created_at", "post_id"),
+    )
 
     post_id = sqla.Column(sqla.Integer, primary_key=True)
     title = sqla.Column(sqla.String(50), nullable=False)
     content = sqla.Column(sqla.Text, nullable=False)
     created_at = sqla.Column(sqla.DateTime, default=datetime.utcnow)
+    updated_at = sqla.Column(sqla.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     author_id = sqla.Column(sqla.Integer, sqla.ForeignKey("users.user_id"))
 
     @staticmethod
@@ -77,10 +140,231 @@ class Post(Updatable, Base):
         """Return query to retrieve all posts."""
         return db.query(Post)
 
+    @property
+    def etag(self) -> str:
+        """Entity tag of post representation, including its author."""
+        return make_etag(self.post_id, self.updated_at, self.author.etag)
+
     def __repr__(self):
         return f"<Post {self.title}>"
 
 
+class PostSearch:
+    """Full-text index over post titles and contents.
+
+    SQLite keeps the index in 'posts_search' FTS5 table maintained by
+    'index' and 'remove'. Postgres uses a GIN index over a tsvector
+    expression of posts, which the database keeps up to date by itself.
+    """
+    table = sqla.table("posts_search", sqla.column("rowid"), sqla.column("title"),
+                       sqla.column("content"), sqla.column("rank"))
+    # Literals are rendered inline, so that queries match the expression index.
+    language = sqla.literal_column("'english'")
+    document = sqla.func.to_tsvector(language, Post.title + sqla.literal_column("' '") + Post.content)
+
+    @staticmethod
+    def dialect(db) -> str:
+        """Return name of database dialect session is bound to."""
+        return db.get_bind().dialect.name
+
+    @staticmethod
+    def index(db: sqla_orm.Session, post: Post):
+        """Add post to index or replace its previous version."""
+        if PostSearch.dialect(db) != "sqlite":
+            return
+        PostSearch.remove(db, post)
+        db.execute(sqla.insert(PostSearch.table).values(rowid=post.post_id, title=post.title, content=post.content))
+
+    @staticmethod
+    def remove(db: sqla_orm.Session, post: Post):
+        """Remove post from index."""
+        if PostSearch.dialect(db) != "sqlite":
+            return
+        db.execute(sqla.delete(PostSearch.table).where(PostSearch.table.c.rowid == post.post_id))
+
+    @staticmethod
+    def rebuild(db: sqla_orm.Session):
+        """Index all posts from scratch, after posts were written bypassing 'index'."""
+        if PostSearch.dialect(db) != "sqlite":
+            return
+        db.execute(sqla.delete(PostSearch.table))
+        db.execute(sqla.insert(PostSearch.table).from_select(
+            ["rowid", "title", "content"], sqla.select(Post.post_id, Post.title, Post.content)))
+
+    @staticmethod
+    def terms(q: str) -> list:
+        """Split search query into words, dropping search syntax."""
+        return re.findall(r"\w+", q)
+
+    @staticmethod
+    def select(dialect: str, terms: list):
+        """Return statement to retrieve posts matching all terms, best matches first."""
+        if dialect == "sqlite":
+            match = " ".join(f'"{term}"' for term in terms)
+            return sqla.select(Post).join(PostSearch.table, PostSearch.table.c.rowid == Post.post_id) \
+                .where(sqla.literal_column("posts_search").op("MATCH")(match)) \
+                .order_by(PostSearch.table.c.rank, Post.post_id.desc())
+        query = sqla.func.plainto_tsquery(PostSearch.language, " ".join(terms))
+        return sqla.select(Post).where(PostSearch.document.op("@@")(query)) \
+            .order_by(sqla.func.ts_rank(PostSearch.document, query).desc(), Post.post_id.desc())
+
+
+sqla.event.listen(Post.__table__, "after_create", sqla.DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5(title, content, tokenize='porter unicode61')"
+).execute_if(dialect="sqlite"))
+sqla.event.listen(Post.__table__, "after_drop", sqla.DDL(
+    "DROP TABLE IF EXISTS posts_search"
+).execute_if(dialect="sqlite"))
+sqla.event.listen(Post.__table__, "after_create", sqla.DDL(
+    "CREATE INDEX IF NOT EXISTS ix_posts_search ON posts USING gin (to_tsvector('english', title || ' ' || content))"
+).execute_if(dialect="postgresql"))
+
+
+class Timeline(Base):
+    """SQLAlchemy model to represent 'timelines' table.
+
+    Materialized home feeds: a row per post delivered to a follower, with
+    post creation time so that feed pages are read off the
+    (user_id, created_at, post_id) index. Timelines are trimmed to
+    'feed_timeline_size' newest posts. Posts of authors with more than
+    'feed_fanout_limit' followers are not delivered and are merged into
+    the feed at read time instead.
+    """
+    __tablename__ = "timelines"
+    __table_args__ = (
+        sqla.Index("ix_timelines_user_id_created_at_post_id", "user_id", "created_at", "post_id"),
+    )
+
+    user_id = sqla.Column(sqla.Integer, sqla.ForeignKey("users.user_id"), primary_key=True)
+    post_id = sqla.Column(sqla.Integer, sqla.ForeignKey("posts.post_id"), primary_key=True)
+    created_at = sqla.Column(sqla.DateTime, nullable=False)
+
+    @staticmethod
+    def fans_out(db: sqla_orm.Session, user_id: int) -> bool:
+        """Check if posts of user are delivered on write."""
+        count = db.query(User.followers_count).filter(User.user_id == user_id).scalar()
+        return count <= settings.feed_fanout_limit
+
+    @staticmethod
+    def fan_out(db: sqla_orm.Session, post: Post):
+        """Deliver new post to timelines of author followers."""
+        if not Timeline.fans_out(db, post.author_id):
+            return
+        select = sqla.select(followers.c.follower_id, sqla.literal(post.post_id), sqla.literal(post.created_at)) \
+            .where(followers.c.followed_id == post.author_id)
+        db.execute(sqla.insert(Timeline).from_select(["user_id", "post_id", "created_at"], select))
+
+    @staticmethod
+    def remove(db: sqla_orm.Session, post: Post):
+        """Remove post from all timelines."""
+        db.execute(sqla.delete(Timeline).where(Timeline.post_id == post.post_id)
+                   .execution_options(synchronize_session=False))
+
+    @staticmethod
+    def backfill(db: sqla_orm.Session, user, followed):
+        """Deliver recent posts of newly followed user to user timeline."""
+        if not Timeline.fans_out(db, followed.user_id):
+            return
+        select = sqla.select(sqla.literal(user.user_id), Post.post_id, Post.created_at) \
+            .where(Post.author_id == followed.user_id) \
+            .order_by(Post.created_at.desc(), Post.post_id.desc()) \
+            .limit(settings.feed_backfill_size)
+        db.execute(sqla.insert(Timeline).from_select(["user_id", "post_id", "created_at"], select))
+
+    @staticmethod
+    def backfill_all(db: sqla_orm.Session, author_id: Optional[int] = None):
+        """Deliver recent posts of followed users to all timelines, or of one author only.
+
+        Used after follows or posts were written bypassing 'fan_out' and
+        'backfill', rows that are already delivered are kept.
+        """
+        recent = sqla.select(
+            Post.post_id, Post.author_id, Post.created_at,
+            sqla.func.row_number().over(partition_by=Post.author_id,
+                                        order_by=(Post.created_at.desc(), Post.post_id.desc())).label("position")
+        )
+        if author_id is not None:
+            recent = recent.where(Post.author_id == author_id)
+        recent = recent.subquery()
+        delivered = sqla.select(Timeline.post_id) \
+            .where(Timeline.user_id == followers.c.follower_id, Timeline.post_id == recent.c.post_id)
+        select = sqla.select(followers.c.follower_id, recent.c.post_id, recent.c.created_at).select_from(followers) \
+            .join(recent, recent.c.author_id == followers.c.followed_id) \
+            .join(User, User.user_id == followers.c.followed_id) \
+            .where(recent.c.position <= settings.feed_backfill_size,
+                   User.followers_count <= settings.feed_fanout_limit,
+                   ~delivered.exists())
+        db.execute(sqla.insert(Timeline).from_select(["user_id", "post_id", "created_at"], select))
+
+    @staticmethod
+    def trim(db: sqla_orm.Session, user, followed):
+        """Remove posts of unfollowed user from user timeline.
+
+        When followed user is left with just 'feed_fanout_limit' followers,
+        their posts are delivered on write again. Posts they wrote while
+        they had more followers never were, so their recent posts are
+        delivered to the remaining followers.
+        """
+        posts = sqla.select(Post.post_id).where(Post.author_id == followed.user_id)
+        db.execute(sqla.delete(Timeline).where(Timeline.user_id == user.user_id, Timeline.post_id.in_(posts))
+                   .execution_options(synchronize_session=False))
+        count = db.query(User.followers_count).filter(User.user_id == followed.user_id).scalar()
+        if count == settings.feed_fanout_limit:
+            Timeline.backfill_all(db, followed.user_id)
+
+    @staticmethod
+    def truncate(db: sqla_orm.Session) -> int:
+        """Trim timelines to 'feed_timeline_size' newest posts.
+
+        Each timeline is trimmed in its own transaction, to keep locks
+        short. Return number of removed rows.
+        """
+        size = settings.feed_timeline_size
+        key = (Timeline.created_at, Timeline.post_id)
+        oversized = db.execute(sqla.select(Timeline.user_id).group_by(Timeline.user_id)
+                               .having(sqla.func.count() > size)).scalars().all()
+        removed = 0
+        for user_id in oversized:
+            oldest = db.execute(sqla.select(*key).where(Timeline.user_id == user_id)
+                                .order_by(*(column.desc() for column in key)).offset(size - 1).limit(1)).first()
+            result = db.execute(sqla.delete(Timeline)
+                                .where(Timeline.user_id == user_id, sqla.tuple_(*key) < tuple(oldest))
+                                .execution_options(synchronize_session=False))
+            db.commit()
+            removed += result.rowcount
+        return removed
+
+    @staticmethod
+    def select_celebrities(user_id: int):
+        """Return statement selecting followed users whose posts are merged into feed at read time."""
+        following = sqla.select(followers.c.followed_id).where(followers.c.follower_id == user_id)
+        return sqla.select(User.user_id) \
+            .where(User.user_id.in_(following), User.followers_count > settings.feed_fanout_limit)
+
+    @staticmethod
+    def feed_candidates(user_id: int, celebrities: list, limit: int, offset: int, cursor: Optional[str]):
+        """Return statement selecting ids of posts a feed page is cut out of.
+
+        Timeline of user and posts of every celebrity are each read off
+        their index newest first, past cursor, at most one page and offset
+        deep, so that reading a page doesn't depend on size of timeline.
+        """
+        size = offset + limit
+        sources = [paginate(sqla.select(Timeline.post_id).where(Timeline.user_id == user_id),
+                            (Timeline.created_at, Timeline.post_id), True, size, 0, cursor)]
+        for author_id in celebrities:
+            sources.append(paginate(sqla.select(Post.post_id).where(Post.author_id == author_id),
+                                    (Post.created_at, Post.post_id), True, size, 0, cursor))
+        return sqla.union_all(*(sqla.select(source.subquery().c.post_id) for source in sources))
+
+    @staticmethod
+    def select_feed(db: sqla_orm.Session, user, limit: int, offset: int, cursor: Optional[str]):
+        """Return query to retrieve posts of users that user follows, enough for requested page."""
+        celebrities = db.execute(Timeline.select_celebrities(user.user_id)).scalars().all()
+        return db.query(Post).filter(
+            Post.post_id.in_(Timeline.feed_candidates(user.user_id, celebrities, limit, offset, cursor)))
+
+
 class User(Updatable, Base):
     """SQLAlchemy model to represent 'users' table."""
     __tablename__ = "users"
@@ -92,6 +376,10 @@ class User(Updatable, Base):
     about_me = sqla.Column(sqla.Text)
     last_seen = sqla.Column(sqla.DateTime, default=datetime.utcnow)
     member_since = sqla.Column(sqla.DateTime, default=datetime.utcnow)
+    updated_at = sqla.Column(sqla.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    followers_count = sqla.Column(sqla.Integer, nullable=False, default=0, server_default="0")
+    following_count = sqla.Column(sqla.Integer, nullable=False, default=0, server_default="0")
+    posts_count = sqla.Column(sqla.Integer, nullable=False, default=0, server_default="0")
 
     tokens = sqla_orm.relationship("Token", backref="user", cascade="all, delete", lazy="dynamic")
     posts = sqla_orm.relationship("Post", backref="author", cascade="all, delete", lazy="dynamic")
@@ -113,12 +401,35 @@ class User(Updatable, Base):
         self.password_hash = generate_password_hash(password)
 
     def verify_password(self, password: str) -> bool:
-        """Verify password."""
-        return check_password_hash(self.password_hash, password)
+        """Verify password, upgrading hash to configured algorithm on success."""
+        if not check_password_hash(self.password_hash, password):
+            return False
+        if password_needs_rehash(self.password_hash):
+            self.password = password
+        return True
+
+    @property
+    def etag(self) -> str:
+        """Entity tag of user representation.
+
+        Last seen time and counters are written with core updates, so they
+        are part of the tag next to the update timestamp.
+        """
+        return make_etag(self.user_id, self.updated_at, self.last_seen,
+                         self.followers_count, self.following_count, self.posts_count)
 
     def ping(self):
-        """Update user last seen."""
-        self.last_seen = datetime.utcnow()
+        """Update user last seen.
+
+        The new value is not marked as a change of the row, it is written later
+        by 'last_seen_buffer' at most once per 'last_seen_granularity' seconds.
+        """
+        now = datetime.utcnow()
+        if self.last_seen and now - self.last_seen < timedelta(seconds=settings.last_seen_granularity):
+            return
+        sqla_orm.attributes.set_committed_value(self, "last_seen", now)
+        if self.user_id is not None:
+            last_seen_buffer.record(self.user_id, now)
 
     def generate_access_token(self):
         """Generate access token."""
@@ -129,11 +440,45 @@ class User(Updatable, Base):
     @staticmethod
     def verify_access_token(access_token: str = Depends(oauth2_scheme), db: sqla_orm.Session = Depends(get_db)):
         """Verify access token and return user."""
-        token = db.query(Token).filter(Token.access_token == access_token).first()
-        if token:
-            if token.access_expiration > datetime.utcnow():
-                token.user.ping()
-                return token.user 
+        if settings.signed_access_tokens:
+            cached = Token.read_signed(access_token)
+        else:
+            cached = token_cache.get(access_token)
+        if cached is None:
+            token = db.query(Token).filter(Token.access_token == access_token).first()
+            if token is None:
+                raise errors.Unauthorized
+            cached = (token.user_id, token.access_expiration)
+            token_cache.set(access_token, cached)
+        user_id, access_expiration = cached
+        if access_expiration > datetime.utcnow():
+            user = db.get(User, user_id)
+            if user:
+                user.ping()
+                return user
+        raise errors.Unauthorized
+
+    @staticmethod
+    async def verify_access_token_async(access_token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+        """Verify access token and return user, asyncio version."""
+        if settings.signed_access_tokens:
+            cached = Token.read_signed(access_token)
+        else:
+            cached = token_cache.get(access_token)
+        if cached is None:
+            result = await db.execute(sqla.select(Token.user_id, Token.access_expiration)
+                                      .where(Token.access_token == access_token))
+            cached = result.first()
+            if cached is None:
+                raise errors.Unauthorized
+            cached = tuple(cached)
+            token_cache.set(access_token, cached)
+        user_id, access_expiration = cached
+        if access_expiration > datetime.utcnow():
+            user = await db.get(User, user_id)
+            if user:
+                user.ping()
+                return user
         raise errors.Unauthorized
 
     @staticmethod
@@ -148,23 +493,75 @@ class User(Updatable, Base):
                 return token 
         raise errors.Unauthorized
 
-    def is_following(self, user):
+    def is_following(self, user) -> bool:
         """Check if curretn user follows user."""
-        return self in user.followers
+        db = sqla_orm.object_session(self)
+        return db.execute(User.select_is_following(self.user_id, user.user_id)).scalar()
 
-    def is_followed_by(self, user):
+    def is_followed_by(self, user) -> bool:
         """Check if current user is followed by user."""
-        return self in user.following
-
-    def follow(self, user):
-        """Follow user."""
-        if not self.is_following(user):
-            user.followers.append(self)
+        return user.is_following(self)
+
+    def follow(self, user) -> bool:
+        """Follow user, return False if user is already followed.
+
+        Existing follow is detected by the insert itself, so that concurrent
+        follows of the same user don't fail on primary key.
+        """
+        db = sqla_orm.object_session(self)
+        insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}[db.get_bind().dialect.name]
+        result = db.execute(insert(followers).values(follower_id=self.user_id, followed_id=user.user_id)
+                            .on_conflict_do_nothing())
+        if result.rowcount == 0:
+            return False
+        self.count_follow(user, 1)
+        return True
+
+    def unfollow(self, user) -> bool:
+        """Unfollow user, return False if user is not followed."""
+        db = sqla_orm.object_session(self)
+        result = db.execute(sqla.delete(followers).where(followers.c.follower_id == self.user_id,
+                                                          followers.c.followed_id == user.user_id))
+        if result.rowcount == 0:
+            return False
+        self.count_follow(user, -1)
+        return True
+
+    def count(self, counter: str, delta: int):
+        """Add delta to counter column in database, without reading it first."""
+        db = sqla_orm.object_session(self)
+        users = User.__table__
+        db.execute(sqla.update(users).where(users.c.user_id == self.user_id)
+                   .values({counter: users.c[counter] + delta}))
+
+    def count_follow(self, user, delta: int):
+        """Update follow counters of both users, locking rows in primary key order."""
+        counters = sorted([(self, "following_count"), (user, "followers_count")], key=lambda c: c[0].user_id)
+        for counted, counter in counters:
+            counted.count(counter, delta)
 
-    def unfollow(self, user):
-        """Unfollow user."""
-        if self.is_following(user):
-            user.followers.remove(self)
+    @staticmethod
+    def reconcile_counters(db: sqla_orm.Session, batch_size: int = 1000) -> int:
+        """Recompute counters from followers and posts tables, return number of fixed users."""
+        users = User.__table__
+        actual = {
+            "followers_count": sqla.select(sqla.func.count()).select_from(followers)
+                .where(followers.c.followed_id == users.c.user_id).scalar_subquery(),
+            "following_count": sqla.select(sqla.func.count()).select_from(followers)
+                .where(followers.c.follower_id == users.c.user_id).scalar_subquery(),
+            "posts_count": sqla.select(sqla.func.count()).select_from(Post.__table__)
+                .where(Post.__table__.c.author_id == users.c.user_id).scalar_subquery(),
+        }
+        drifted = sqla.or_(*(users.c[counter] != value for counter, value in actual.items()))
+        last_id = db.query(sqla.func.max(User.user_id)).scalar() or 0
+        fixed = 0
+        for start in range(0, last_id + 1, batch_size):
+            result = db.execute(sqla.update(users)
+                                .where(users.c.user_id >= start, users.c.user_id < start + batch_size, drifted)
+                                .values(actual))
+            db.commit()
+            fixed += result.rowcount
+        return fixed
 
     @staticmethod
     def select_all(db: sqla_orm.Session):
@@ -179,6 +576,24 @@ class User(Updatable, Base):
         """Select current user followers."""
         return self.followers
 
+    @staticmethod
+    def select_following_of(user_id: int):
+        """Return statement to select all users user with given id follows."""
+        return sqla.select(User).join(followers, followers.c.followed_id == User.user_id) \
+            .where(followers.c.follower_id == user_id)
+
+    @staticmethod
+    def select_followers_of(user_id: int):
+        """Return statement to select followers of user with given id."""
+        return sqla.select(User).join(followers, followers.c.follower_id == User.user_id) \
+            .where(followers.c.followed_id == user_id)
+
+    @staticmethod
+    def select_is_following(follower_id: int, followed_id: int):
+        """Return statement to check if one user follows another."""
+        return sqla.select(sqla.exists().where(followers.c.follower_id == follower_id,
+                                               followers.c.followed_id == followed_id))
+
     @staticmethod
     def validate_username(username: str, db: sqla_orm.Session) -> bool:
         user = db.query(User).filter(User.username == username).first()
@@ -195,3 +610,6 @@ class User(Updatable, Base):
 
     def __repr__(self):
         return f"<User {self.username}>"
+
+
+last_seen_buffer = WriteBehindBuffer(User.__table__.c.user_id, User.__table__.c.last_seen)
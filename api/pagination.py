@@ -0,0 +1,196 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from threading import Lock
+from typing import Any, NamedTuple, Optional
+import json
+
+import sqlalchemy as sqla
+
+from . import errors
+from .cache import TTLCache
+from config import settings
+
+# Table name -> number of rows, see 'table_count'. Last counts are kept
+# after they expire, to be served while one request counts again.
+table_counts = TTLCache(64, settings.count_cache_ttl)
+last_counts = {}
+count_locks = {}
+
+
+class Page(NamedTuple):
+    """Query of paginated view, with total number of rows it selects if known."""
+    query: Any
+    total: Optional[int] = None
+
+
+def as_page(result) -> Page:
+    """Wrap query returned by paginated view, unless it is a 'Page' already."""
+    return result if isinstance(result, Page) else Page(result)
+
+
+def estimate_statement(table: sqla.Table):
+    """Return statement selecting Postgres planner estimate of table rows."""
+    return sqla.text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)") \
+        .bindparams(table=table.name)
+
+
+def count_statement(table: sqla.Table):
+    """Return statement counting table rows."""
+    return sqla.select(sqla.func.count()).select_from(table)
+
+
+def use_estimate(estimate: Optional[int]) -> bool:
+    """Check if planner estimate is there and large enough to stand for exact count."""
+    return estimate is not None and estimate >= settings.exact_count_threshold
+
+
+def begin_count(table: sqla.Table, blocking: bool) -> tuple:
+    """Return cached count of table, or lock to count it under.
+
+    Only one request counts a table at a time, others get the last count
+    while it is running. If there is none yet, sync requests wait for the
+    running count and asyncio ones, which can't block, count as well.
+    """
+    total = table_counts.get(table.name)
+    if total is not None:
+        return total, None
+    lock = count_locks.setdefault(table.name, Lock())
+    last = last_counts.get(table.name)
+    if not lock.acquire(blocking=blocking and last is None):
+        return last, None
+    total = table_counts.peek(table.name)
+    if total is None:
+        return None, lock
+    # Counted by the request waited for.
+    lock.release()
+    return total, None
+
+
+def end_count(table: sqla.Table, total: int, lock: Optional[Lock]):
+    """Cache count of table and release its lock."""
+    table_counts.set(table.name, total)
+    last_counts[table.name] = total
+    if lock is not None:
+        lock.release()
+
+
+def table_count(db, model) -> int:
+    """Return number of rows of model table, cached for 'count_cache_ttl' seconds.
+
+    On Postgres tables over 'exact_count_threshold' rows are not counted,
+    planner estimate is used instead.
+    """
+    table = model.__table__
+    total, lock = begin_count(table, blocking=True)
+    if total is not None:
+        return total
+    try:
+        estimate = None
+        if db.get_bind().dialect.name == "postgresql":
+            estimate = db.execute(estimate_statement(table)).scalar()
+        total = estimate if use_estimate(estimate) else db.execute(count_statement(table)).scalar()
+    except Exception:
+        if lock is not None:
+            lock.release()
+        raise
+    end_count(table, total, lock)
+    return total
+
+
+async def async_table_count(db, model) -> int:
+    """Asyncio version of 'table_count'."""
+    table = model.__table__
+    total, lock = begin_count(table, blocking=False)
+    if total is not None:
+        return total
+    try:
+        estimate = None
+        if db.get_bind().dialect.name == "postgresql":
+            estimate = (await db.execute(estimate_statement(table))).scalar()
+        total = estimate if use_estimate(estimate) else (await db.execute(count_statement(table))).scalar()
+    except Exception:
+        if lock is not None:
+            lock.release()
+        raise
+    end_count(table, total, lock)
+    return total
+
+
+def clamp_limit(limit: int) -> int:
+    """Keep requested page size within server-enforced bounds."""
+    return max(1, min(limit, settings.max_page_limit))
+
+
+def encode_cursor(*values) -> str:
+    """Encode sort key values of the last row into an opaque cursor."""
+    data = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return urlsafe_b64encode(json.dumps(data).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, columns: tuple) -> list:
+    """Decode an opaque cursor into sort key values of given columns."""
+    try:
+        data = json.loads(urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(data, list) or len(data) != len(columns):
+            raise ValueError
+        values = []
+        for column, value in zip(columns, data):
+            if column.type.python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            else:
+                values.append(column.type.python_type(value))
+        return values
+    except (ValueError, TypeError):
+        raise errors.BadRequest("Invalid cursor")
+
+
+def parse_keys(keys: str, type=int) -> list:
+    """Split comma separated keys, dropping duplicates but keeping the order."""
+    try:
+        values = list(dict.fromkeys(type(key.strip()) for key in keys.split(",") if key.strip()))
+    except ValueError:
+        raise errors.BadRequest("Invalid ids")
+    if not 0 < len(values) <= settings.max_batch_size:
+        raise errors.BadRequest(f"Between 1 and {settings.max_batch_size} ids can be requested")
+    return values
+
+
+def batch_response(name: str, rows: list, column, keys: list) -> dict:
+    """Build response out of rows fetched by keys, in the order keys were requested."""
+    found = {getattr(row, column.key): row for row in rows}
+    return {name: [found[key] for key in keys if key in found], "missing": [key for key in keys if key not in found]}
+
+
+def paginate(query, columns: tuple, descending: bool, limit: int, offset: int, cursor: Optional[str]):
+    """Order query by key columns and seek past cursor or skip offset rows.
+
+    One extra row is requested so that the caller knows if there is a next page.
+    Works with both ORM queries and core select statements.
+    """
+    query = query.order_by(*(column.desc() if descending else column.asc() for column in columns))
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if len(columns) == 1:
+            key, values = columns[0], values[0]
+        else:
+            key, values = sqla.tuple_(*columns), tuple(values)
+        query = query.filter(key < values if descending else key > values)
+    else:
+        query = query.offset(offset)
+    return query.limit(limit + 1)
+
+
+def page_response(name: str, rows: list, columns: tuple, limit: int, offset: int, cursor: Optional[str],
+                  total: Optional[int] = None) -> dict:
+    """Build paginated response out of rows fetched with 'paginate'.
+
+    Extra row is cut off and next cursor points past the last returned row,
+    lists paginated by offset only pass no key columns and get no cursor.
+    """
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if columns:
+            next_cursor = encode_cursor(*(getattr(rows[-1], column.key) for column in columns))
+    return {name: rows, "pagination": {"limit": limit, "offset": offset, "cursor": cursor, "next_cursor": next_cursor,
+                                       "total": total}}
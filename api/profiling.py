@@ -0,0 +1,120 @@
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+import json
+import logging
+import re
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists render one placeholder per value, they are collapsed so
+# that statements differing only in list length share a shape.
+PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize statement, so that repeated queries compare equal."""
+    return PLACEHOLDER_LIST.sub("(?)", WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestProfile:
+    """SQL statements executed while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement: str, duration: float):
+        """Record executed statement."""
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> list:
+        """Return (shape, count) of statements executed at least 'threshold' times."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+# Profile of current request, shared with the threadpool threads sync routes
+# run in, as they copy the request context.
+request_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+    """Remember when statement started, if a request is being profiled."""
+    if request_profile.get() is not None:
+        conn.info.setdefault("profile_start", []).append(perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def end_statement(conn, cursor, statement, parameters, context, executemany):
+    """Record statement duration against request being profiled."""
+    profile = request_profile.get()
+    starts = conn.info.get("profile_start")
+    if profile is not None and starts:
+        profile.record(statement, perf_counter() - starts.pop())
+
+
+class ProfilingMiddleware:
+    """Profile SQL statements of every request.
+
+    Statement count and database time are sent in 'Server-Timing' header,
+    statements repeated 'sql_profiling_repeat_threshold' times or more are
+    reported as likely N+1 queries. Every request is also logged as a JSON
+    line. Statements executed after response headers are sent, e.g. while
+    streaming, only show in the log.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile()
+        threshold = settings.sql_profiling_repeat_threshold
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", server_timing(profile, threshold))]
+            await send(message)
+
+        token = request_profile.set(profile)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_profile.reset(token)
+            repeated = profile.repeated(threshold)
+            log = logger.warning if repeated else logger.info
+            log("%s", json.dumps({
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round((perf_counter() - start) * 1000, 3),
+                "sql_statements": profile.count,
+                "sql_duration_ms": round(profile.duration * 1000, 3),
+                "sql_repeated": [{"statement": shape, "count": count} for shape, count in repeated],
+            }))
+
+
+def server_timing(profile: RequestProfile, threshold: int) -> bytes:
+    """Build 'Server-Timing' header value out of request profile so far."""
+    metrics = [f'db;dur={profile.duration * 1000:.3f};desc="{profile.count} statements"']
+    repeated = profile.repeated(threshold)
+    if repeated:
+        metrics.append(f'db-repeated;desc="{len(repeated)} shapes, {sum(count for _, count in repeated)} statements"')
+    return ", ".join(metrics).encode("latin-1")
@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from math import ceil
+from threading import Lock
+from typing import NamedTuple, Optional
+import logging
+import re
+import time
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import exc, text
+from starlette.concurrency import run_in_threadpool
+
+from . import errors
+from .clients import client_key
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Requests belong to the first group matching their method and path, groups
+# without a limit in 'rate_limits' setting are not limited.
+ROUTE_GROUPS = (
+    ("login", {"POST", "PUT"}, re.compile(r"/tokens/?$")),
+    ("write", {"POST", "PUT", "PATCH", "DELETE"}, None),
+    ("read", {"GET", "HEAD"}, None),
+)
+
+
+class Limit(NamedTuple):
+    """Token bucket holding up to 'burst' tokens, refilled by 'rate' tokens per second."""
+    burst: int
+    rate: float
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Parse '<requests>/<seconds>' limit."""
+        requests, seconds = value.split("/")
+        return cls(int(requests), int(requests) / float(seconds))
+
+    @property
+    def refill_time(self) -> float:
+        """Seconds an empty bucket takes to fill up."""
+        return self.burst / self.rate
+
+
+def rate_limits() -> dict:
+    """Return configured limits by route group."""
+    return {group: Limit.parse(value) for group, value in settings.rate_limits.items()}
+
+
+def route_group(method: str, path: str) -> Optional[str]:
+    """Return name of group request belongs to."""
+    for group, methods, pattern in ROUTE_GROUPS:
+        if method in methods and (pattern is None or pattern.match(path)):
+            return group
+    return None
+
+
+class MemoryStore:
+    """Token buckets of this process, at most 'maxsize' of them.
+
+    Least recently used buckets are evicted first, buckets that have filled
+    up again are dropped as soon as they are the least recently used, as
+    they don't differ from new ones.
+    """
+    blocking = False
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, key: str, limit: Limit, now: float = None) -> float:
+        """Take token from bucket, return 0 if there was one, otherwise seconds until there is."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._buckets and next(iter(self._buckets.values()))[2] <= now:
+                self._buckets.popitem(last=False)
+            tokens, updated, _ = self._buckets.pop(key, (limit.burst, now, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens, now, now + (limit.burst - tokens) / limit.rate)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class DatabaseStore:
+    """Token buckets in 'rate_limits' table, shared by all processes and nodes.
+
+    Every take is a single upsert. If database is unavailable requests are
+    let through rather than failed.
+    """
+    blocking = True
+
+    def __init__(self, maxsize: int = None):
+        from .database import engine
+        self.engine = engine
+
+    def take(self, key: str, limit: Limit, now: float = None) -> float:
+        """Take token from bucket, return 0 if there was one, otherwise seconds until there is."""
+        now = time.time() if now is None else now
+        least = "least" if self.engine.dialect.name == "postgresql" else "min"
+        refilled = f"{least}(:burst, rate_limits.tokens + (:now - rate_limits.updated_at) * :rate)"
+        statement = text(
+            "INSERT INTO rate_limits (bucket, tokens, updated_at, allowed) VALUES (:bucket, :burst - 1, :now, true) "
+            f"ON CONFLICT (bucket) DO UPDATE SET tokens = CASE WHEN {refilled} >= 1 THEN {refilled} - 1 "
+            f"ELSE {refilled} END, updated_at = :now, allowed = {refilled} >= 1 "
+            "RETURNING tokens, allowed")
+        try:
+            with self.engine.begin() as connection:
+                tokens, allowed = connection.execute(
+                    statement, {"bucket": key, "burst": limit.burst, "rate": limit.rate, "now": now}).one()
+        except exc.DBAPIError:
+            logger.warning("Rate limit store is unavailable", exc_info=True)
+            return 0.0
+        return 0.0 if allowed else (1 - tokens) / limit.rate
+
+    @staticmethod
+    def clean(db, idle: float) -> int:
+        """Delete buckets not used for 'idle' seconds, return number of deleted buckets."""
+        from .models import RateLimit
+
+        result = db.execute(RateLimit.__table__.delete().where(RateLimit.updated_at < time.time() - idle))
+        db.commit()
+        return result.rowcount
+
+
+STORES = {"memory": MemoryStore, "database": DatabaseStore}
+
+
+class RateLimitMiddleware:
+    """Limit request rate of every client per route group with token buckets.
+
+    Requests over the limit get 429 Too Many Requests with 'Retry-After'.
+    """
+
+    def __init__(self, app, store=None):
+        self.app = app
+        self.limits = rate_limits()
+        self.store = store or STORES[settings.rate_limit_backend](settings.rate_limit_store_size)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        group = route_group(scope["method"], scope["path"])
+        limit = self.limits.get(group)
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        key = f"{group}:{client_key(scope)}"
+        if self.store.blocking:
+            wait = await run_in_threadpool(self.store.take, key, limit)
+        else:
+            wait = self.store.take(key, limit)
+        if not wait:
+            return await self.app(scope, receive, send)
+        error = errors.TooManyRequests(retry_after=ceil(wait))
+        response = JSONResponse({"detail": error.detail}, status_code=error.status_code, headers=error.headers)
+        await response(scope, receive, send)
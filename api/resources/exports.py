@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+import orjson
+import sqlalchemy as sqla
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import get_read_db
+from ..serializers import JSON_OPTIONS
+from config import settings
+
+exports = APIRouter(tags=["Exports"])
+
+POST_COLUMNS = (models.Post.post_id, models.Post.title, models.Post.content, models.Post.created_at,
+                models.Post.updated_at, models.Post.author_id)
+USER_COLUMNS = (models.User.user_id, models.User.username, models.User.about_me, models.User.last_seen,
+                models.User.member_since, models.User.followers_count, models.User.following_count,
+                models.User.posts_count)
+
+
+def ndjson(db: Session, statement):
+    """Stream rows of statement as newline delimited JSON.
+
+    Rows are fetched 'export_batch_size' at a time through a server-side
+    cursor, and every batch is sent as one chunk.
+    """
+    result = db.execute(statement.execution_options(yield_per=settings.export_batch_size))
+    for rows in result.mappings().partitions():
+        yield b"".join(orjson.dumps(dict(row), option=JSON_OPTIONS | orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+@exports.get("/export/posts")
+def export_posts(since: Optional[datetime] = None, db: Session = Depends(get_read_db)):
+    """Export all posts, or posts created since given time, as NDJSON."""
+    statement = sqla.select(*POST_COLUMNS).order_by(models.Post.post_id)
+    if since is not None:
+        statement = statement.where(models.Post.created_at >= since)
+    return StreamingResponse(ndjson(db, statement), media_type="application/x-ndjson")
+
+
+@exports.get("/export/users")
+def export_users(since: Optional[datetime] = None, db: Session = Depends(get_read_db)):
+    """Export all users, or users registered since given time, as NDJSON."""
+    statement = sqla.select(*USER_COLUMNS).order_by(models.User.user_id)
+    if since is not None:
+        statement = statement.where(models.User.member_since >= since)
+    return StreamingResponse(ndjson(db, statement), media_type="application/x-ndjson")
@@ -1,11 +1,16 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import errors, models, schemas
-from ..database import get_db
-from .users import paginated_users
+from ..database import get_async_db, get_db, get_read_db
+from ..pagination import Page
+from .users import async_paginated_users, paginated_users
 
 follows = APIRouter(tags=["Follows"])
+async_follows = APIRouter(tags=["Follows"])
 
 
 @follows.post("/me/following/{user_id}", status_code=204)
@@ -14,9 +19,9 @@ def follow_user(user_id: int, db: Session = Depends(get_db), current_user: model
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if user is None:
         raise errors.UserNotFound
-    if current_user.is_following(user):
+    if not current_user.follow(user):
         raise errors.Conflict("You already follow this user")
-    current_user.follow(user)
+    models.Timeline.backfill(db, current_user, user)
     db.commit()
     return {} 
 
@@ -27,15 +32,15 @@ def unfollow_user(user_id: int, db: Session = Depends(get_db), current_user: mod
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if user is None:
         raise errors.UserNotFound
-    if not current_user.is_following(user):
+    if not current_user.unfollow(user):
         raise errors.Conflict("You are not following this user")
-    current_user.unfollow(user)
+    models.Timeline.trim(db, current_user, user)
     db.commit()
     return {}
 
 
 @follows.get("/me/following/{user_id}", status_code=204)
-def check_me_following(user_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(models.User.verify_access_token)):
+def check_me_following(user_id: int, db: Session = Depends(get_read_db), current_user: models.User = Depends(models.User.verify_access_token)):
     """Check if a user is followed."""
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if user is None:
@@ -47,33 +52,79 @@ def check_me_following(user_id: int, db: Session = Depends(get_db), current_user
 
 @follows.get("/me/following", response_model=schemas.UserPagination)
 @paginated_users
-def retrieve_me_following(current_user: models.User = Depends(models.User.verify_access_token), limit: int = 10, offset: int = 0):
+def retrieve_me_following(current_user: models.User = Depends(models.User.verify_access_token), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
     """Retrieve the users the logged in user is following."""
-    return current_user.select_following()
+    return Page(current_user.select_following(), current_user.following_count)
 
 
 @follows.get("/me/followers", response_model=schemas.UserPagination)
 @paginated_users
-def retrieve_my_followers(current_user: models.User = Depends(models.User.verify_access_token), limit: int = 10, offset: int = 0):
+def retrieve_my_followers(current_user: models.User = Depends(models.User.verify_access_token), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
     """Retrieve the followers of the logged in user."""
-    return current_user.select_followers()
+    return Page(current_user.select_followers(), current_user.followers_count)
 
 
 @follows.get("/users/{user_id}/following", response_model=schemas.UserPagination)
 @paginated_users
-def retrieve_following(user_id: int, db: Session = Depends(get_db), limit: int = 10, offset: int = 0):
+def retrieve_following(user_id: int, db: Session = Depends(get_read_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
     """Retrieve the users this user is following."""
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if user is None:
         raise errors.UserNotFound
-    return user.select_following()
+    return Page(user.select_following(), user.following_count)
 
 
 @follows.get("/users/{user_id}/followers", response_model=schemas.UserPagination)
 @paginated_users
-def retrieve_followers(user_id: int, db: Session = Depends(get_db), limit: int = 10, offset: int = 0):
+def retrieve_followers(user_id: int, db: Session = Depends(get_read_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
     """Retrieve the followers of the user."""
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if user is None:
         raise errors.UserNotFound
-    return user.select_followers()
+    return Page(user.select_followers(), user.followers_count)
+
+
+@async_follows.get("/me/following/{user_id}", status_code=204)
+async def check_me_following_async(user_id: int, db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(models.User.verify_access_token_async)):
+    """Check if a user is followed."""
+    user = await db.get(models.User, user_id)
+    if user is None:
+        raise errors.UserNotFound
+    result = await db.execute(models.User.select_is_following(current_user.user_id, user_id))
+    if not result.scalar():
+        raise errors.FollowNotFound
+    return {}
+
+
+@async_follows.get("/me/following", response_model=schemas.UserPagination)
+@async_paginated_users
+async def retrieve_me_following_async(db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(models.User.verify_access_token_async), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
+    """Retrieve the users the logged in user is following."""
+    return Page(models.User.select_following_of(current_user.user_id), current_user.following_count)
+
+
+@async_follows.get("/me/followers", response_model=schemas.UserPagination)
+@async_paginated_users
+async def retrieve_my_followers_async(db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(models.User.verify_access_token_async), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
+    """Retrieve the followers of the logged in user."""
+    return Page(models.User.select_followers_of(current_user.user_id), current_user.followers_count)
+
+
+@async_follows.get("/users/{user_id}/following", response_model=schemas.UserPagination)
+@async_paginated_users
+async def retrieve_following_async(user_id: int, db: AsyncSession = Depends(get_async_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
+    """Retrieve the users this user is following."""
+    user = await db.get(models.User, user_id)
+    if user is None:
+        raise errors.UserNotFound
+    return Page(models.User.select_following_of(user_id), user.following_count)
+
+
+@async_follows.get("/users/{user_id}/followers", response_model=schemas.UserPagination)
+@async_paginated_users
+async def retrieve_followers_async(user_id: int, db: AsyncSession = Depends(get_async_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
+    """Retrieve the followers of the user."""
+    user = await db.get(models.User, user_id)
+    if user is None:
+        raise errors.UserNotFound
+    return Page(models.User.select_followers_of(user_id), user.followers_count)
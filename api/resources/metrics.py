@@ -0,0 +1,21 @@
+from hmac import compare_digest
+
+from fastapi import APIRouter, Header
+from fastapi.responses import PlainTextResponse
+
+from .. import errors, metrics as metrics_module
+from config import settings
+
+metrics = APIRouter(tags=["Metrics"])
+
+
+@metrics.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def retrieve_metrics(authorization: str = Header(default="")):
+    """Retrieve metrics in Prometheus text format.
+
+    If 'metrics_token' is set, it has to be sent as bearer token.
+    """
+    if settings.metrics_token and not compare_digest(authorization.encode(),
+                                                     f"Bearer {settings.metrics_token}".encode()):
+        raise errors.Unauthorized()
+    return PlainTextResponse(metrics_module.render(), media_type="text/plain; version=0.0.4")
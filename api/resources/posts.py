@@ -1,23 +1,79 @@
 from functools import wraps
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import ORJSONResponse
+import sqlalchemy as sqla
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from .. import errors, models, schemas
-from ..database import get_db
+from ..conditional import not_modified
+from ..database import get_async_db, get_db, get_read_db
+from ..pagination import (as_page, async_table_count, batch_response, clamp_limit, page_response, paginate,
+                          parse_keys, Page, table_count)
+from ..serializers import post_dicts, select_posts
 
 posts = APIRouter(tags=["Posts"])
+async_posts = APIRouter(tags=["Posts"])
+
+# Posts are listed newest first, keyset is backed by the (created_at, post_id) indexes.
+POST_KEY = (models.Post.created_at, models.Post.post_id)
 
 
 def paginated_posts(f):
-    """If you decorate view with this, it will return paginated posts response."""
+    """If you decorate view with this, it will return paginated posts response.
+
+    When view is called with 'ids', only posts with these ids are returned
+    in one query, in requested order, instead of a page. Response is built
+    from selected columns and skips 'response_model' validation. View may
+    return 'Page' to report total number of posts.
+    """
     @wraps(f)
     def wrapper(*args, **kwargs):
-        limit = kwargs.get("limit", 10)
+        limit = clamp_limit(kwargs.get("limit", 10))
+        offset = kwargs.get("offset", 0)
+        cursor = kwargs.get("cursor")
+        page = as_page(f(*args, **kwargs))
+        res = select_posts(page.query)
+        if kwargs.get("ids"):
+            ids = parse_keys(kwargs["ids"])
+            rows = res.filter(models.Post.post_id.in_(ids)).all()
+            content = batch_response("posts", rows, models.Post.post_id, ids)
+        else:
+            rows = paginate(res, POST_KEY, True, limit, offset, cursor).all()
+            content = page_response("posts", rows, POST_KEY, limit, offset, cursor, page.total)
+        content["posts"] = post_dicts(content["posts"])
+        return ORJSONResponse(content)
+    return wrapper
+
+
+def search_statement(db, q: str, limit: int, offset: int):
+    """Return statement to retrieve a page of posts matching search query."""
+    terms = models.PostSearch.terms(q)
+    if not terms:
+        raise errors.BadRequest("Search query has no words.")
+    return select_posts(models.PostSearch.select(models.PostSearch.dialect(db), terms)).offset(offset).limit(limit)
+
+
+def async_paginated_posts(f):
+    """Asyncio version of 'paginated_posts', decorated view must return a select statement."""
+    @wraps(f)
+    async def wrapper(*args, **kwargs):
+        limit = clamp_limit(kwargs.get("limit", 10))
         offset = kwargs.get("offset", 0)
-        res = f(*args, **kwargs)
-        posts = res.limit(limit).offset(offset).all()
-        return {"posts": posts, "pagination": {"limit": limit, "offset": offset}} 
+        cursor = kwargs.get("cursor")
+        page = as_page(await f(*args, **kwargs))
+        res = select_posts(page.query)
+        if kwargs.get("ids"):
+            ids = parse_keys(kwargs["ids"])
+            result = await kwargs["db"].execute(res.where(models.Post.post_id.in_(ids)))
+            content = batch_response("posts", result.all(), models.Post.post_id, ids)
+        else:
+            result = await kwargs["db"].execute(paginate(res, POST_KEY, True, limit, offset, cursor))
+            content = page_response("posts", result.all(), POST_KEY, limit, offset, cursor, page.total)
+        content["posts"] = post_dicts(content["posts"])
+        return ORJSONResponse(content)
     return wrapper
 
 
@@ -26,37 +82,59 @@ def create_post(data: schemas.PostIn, db: Session = Depends(get_db), current_use
     """Create a new post."""
     post = models.Post(author=current_user, **data.dict())
     db.add(post)
+    db.flush()
+    current_user.count("posts_count", 1)
+    models.PostSearch.index(db, post)
+    models.Timeline.fan_out(db, post)
     db.commit()
     db.refresh(post)
     return post 
 
 
+@posts.get("/posts/search", response_model=schemas.PostPagination)
+def search_posts(q: str, db: Session = Depends(get_read_db), limit: int = 10, offset: int = 0):
+    """Search posts by title and content, best matches first."""
+    limit = clamp_limit(limit)
+    # Results are ordered by rank, so they are paged by offset only.
+    content = page_response("posts", db.execute(search_statement(db, q, limit, offset)).all(), (), limit, offset, None)
+    content["posts"] = post_dicts(content["posts"])
+    return ORJSONResponse(content)
+
+
 @posts.get("/posts/{post_id}", response_model=schemas.PostOut)
-def retrieve_post_by_id(post_id: int, db: Session = Depends(get_db)):
+def retrieve_post_by_id(post_id: int, request: Request, response: Response, db: Session = Depends(get_read_db)):
     """Retrieve a post by id."""
-    post = db.query(models.Post).filter(models.Post.post_id == post_id).first()
+    post = db.query(models.Post).options(joinedload(models.Post.author)) \
+        .filter(models.Post.post_id == post_id).first()
     if post is None:
         raise errors.PostNotFound
-    return post 
+    return not_modified(request, response, post.etag) or post
 
 
-@posts.get("/posts", response_model=schemas.PostPagination)
+@posts.get("/posts", response_model=Union[schemas.PostPagination, schemas.PostBatch])
 @paginated_posts
-def retrieve_all_posts(db: Session = Depends(get_db), limit: int = 10, offset: int = 0):
-    """Retrieve all posts."""
-    return models.Post.select_all(db)
+def retrieve_all_posts(db: Session = Depends(get_read_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None, ids: Optional[str] = None):
+    """Retrieve all posts, or posts with comma separated ids."""
+    return Page(models.Post.select_all(db), None if ids else table_count(db, models.Post))
 
 
 @posts.get("/users/{user_id}/posts", response_model=schemas.PostPagination)
 @paginated_posts
-def retrieve_all_user_posts(user_id: int, db: Session = Depends(get_db), limit: int = 10, offset: int = 0):
+def retrieve_all_user_posts(user_id: int, db: Session = Depends(get_read_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
     """Retrieve all posts from a user."""
     user = db.query(models.User).filter(models.User.user_id == user_id).first()
     if user is None:
         raise errors.UserNotFound
-    return user.posts
+    return Page(user.posts, user.posts_count)
     
 
+@posts.get("/me/feed", response_model=schemas.PostPagination)
+@paginated_posts
+def retrieve_feed(db: Session = Depends(get_read_db), current_user: models.User = Depends(models.User.verify_access_token), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
+    """Retrieve posts from the users the logged in user is following."""
+    return models.Timeline.select_feed(db, current_user, clamp_limit(limit), offset, cursor)
+
+
 @posts.put("/posts/{post_id}", response_model=schemas.PostOut)
 def update_post(post_id: int, data: schemas.PostUpdate, db: Session = Depends(get_db), current_user: models.User = Depends(models.User.verify_access_token)):
     """Edit a post."""
@@ -66,6 +144,8 @@ def update_post(post_id: int, data: schemas.PostUpdate, db: Session = Depends(ge
     if post.author != current_user:
         raise errors.Forbidden
     post.update(data.dict())
+    db.flush()
+    models.PostSearch.index(db, post)
     db.commit()
     return post
 
@@ -78,6 +158,55 @@ def delete_post(post_id: int, db: Session = Depends(get_db), current_user: model
         raise errors.PostNotFound
     if post.author != current_user:
         raise errors.Forbidden
+    models.Timeline.remove(db, post)
+    models.PostSearch.remove(db, post)
+    current_user.count("posts_count", -1)
     db.delete(post)
     db.commit()
     return {}
+
+
+@async_posts.get("/posts/search", response_model=schemas.PostPagination)
+async def search_posts_async(q: str, db: AsyncSession = Depends(get_async_db), limit: int = 10, offset: int = 0):
+    """Search posts by title and content, best matches first."""
+    limit = clamp_limit(limit)
+    result = await db.execute(search_statement(db, q, limit, offset))
+    content = page_response("posts", result.all(), (), limit, offset, None)
+    content["posts"] = post_dicts(content["posts"])
+    return ORJSONResponse(content)
+
+
+@async_posts.get("/posts/{post_id}", response_model=schemas.PostOut)
+async def retrieve_post_by_id_async(post_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Retrieve a post by id."""
+    post = await db.get(models.Post, post_id, options=[joinedload(models.Post.author)])
+    if post is None:
+        raise errors.PostNotFound
+    return not_modified(request, response, post.etag) or post
+
+
+@async_posts.get("/posts", response_model=Union[schemas.PostPagination, schemas.PostBatch])
+@async_paginated_posts
+async def retrieve_all_posts_async(db: AsyncSession = Depends(get_async_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None, ids: Optional[str] = None):
+    """Retrieve all posts, or posts with comma separated ids."""
+    return Page(sqla.select(models.Post), None if ids else await async_table_count(db, models.Post))
+
+
+@async_posts.get("/users/{user_id}/posts", response_model=schemas.PostPagination)
+@async_paginated_posts
+async def retrieve_all_user_posts_async(user_id: int, db: AsyncSession = Depends(get_async_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
+    """Retrieve all posts from a user."""
+    user = await db.get(models.User, user_id)
+    if user is None:
+        raise errors.UserNotFound
+    return Page(sqla.select(models.Post).where(models.Post.author_id == user_id), user.posts_count)
+
+
+@async_posts.get("/me/feed", response_model=schemas.PostPagination)
+@async_paginated_posts
+async def retrieve_feed_async(db: AsyncSession = Depends(get_async_db), current_user: models.User = Depends(models.User.verify_access_token_async), limit: int = 10, offset: int = 0, cursor: Optional[str] = None):
+    """Retrieve posts from the users the logged in user is following."""
+    result = await db.execute(models.Timeline.select_celebrities(current_user.user_id))
+    candidates = models.Timeline.feed_candidates(current_user.user_id, result.scalars().all(), clamp_limit(limit),
+                                                 offset, cursor)
+    return sqla.select(models.Post).where(models.Post.post_id.in_(candidates))
@@ -36,7 +36,6 @@ def create_access_token(response: Response, credentials: OAuth2PasswordRequestFo
         raise errors.Unauthorized
     token = user.generate_access_token()
     db.add(token)
-    models.Token.clean(db)
     db.commit()
     return token_response(token, response)
 
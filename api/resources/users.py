@@ -1,23 +1,83 @@
 from functools import wraps
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import ORJSONResponse
+import sqlalchemy as sqla
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import errors, models, schemas
-from ..database  import get_db
+from ..conditional import not_modified
+from ..database  import get_async_db, get_db, get_read_db
+from ..pagination import (as_page, async_table_count, batch_response, clamp_limit, page_response, paginate,
+                          parse_keys, Page, table_count)
+from ..serializers import select_users, user_dicts
 
 users = APIRouter(tags=["Users"])
+async_users = APIRouter(tags=["Users"])
+
+# Users are listed in registration order, keyset is the primary key.
+USER_KEY = (models.User.user_id,)
+
+
+def batch_keys(kwargs: dict) -> Optional[tuple]:
+    """Return column and keys of users requested by 'ids' or 'usernames', if any."""
+    if kwargs.get("ids") and kwargs.get("usernames"):
+        raise errors.BadRequest("Request users either by ids or by usernames.")
+    if kwargs.get("ids"):
+        return models.User.user_id, parse_keys(kwargs["ids"])
+    if kwargs.get("usernames"):
+        return models.User.username, parse_keys(kwargs["usernames"], str)
+    return None
 
 
 def paginated_users(f):
-    """If you decorate view with this, it will return paginated users response."""
+    """If you decorate view with this, it will return paginated users response.
+
+    When view is called with 'ids' or 'usernames', only these users are
+    returned in one query, in requested order, instead of a page. Response
+    is built from selected columns and skips 'response_model' validation.
+    View may return 'Page' to report total number of users.
+    """
     @wraps(f)
     def wrapper(*args, **kwargs):
-        limit = kwargs.get("limit", 10)
+        limit = clamp_limit(kwargs.get("limit", 10))
         offset = kwargs.get("offset", 0)
-        res = f(*args, **kwargs)
-        users = res.limit(limit).offset(offset).all()
-        return {"users": users, "pagination": {"limit": limit, "offset": offset}}
+        cursor = kwargs.get("cursor")
+        page = as_page(f(*args, **kwargs))
+        res = select_users(page.query)
+        batch = batch_keys(kwargs)
+        if batch:
+            column, keys = batch
+            content = batch_response("users", res.filter(column.in_(keys)).all(), column, keys)
+        else:
+            rows = paginate(res, USER_KEY, False, limit, offset, cursor).all()
+            content = page_response("users", rows, USER_KEY, limit, offset, cursor, page.total)
+        content["users"] = user_dicts(content["users"])
+        return ORJSONResponse(content)
+    return wrapper
+
+
+def async_paginated_users(f):
+    """Asyncio version of 'paginated_users', decorated view must return a select statement."""
+    @wraps(f)
+    async def wrapper(*args, **kwargs):
+        limit = clamp_limit(kwargs.get("limit", 10))
+        offset = kwargs.get("offset", 0)
+        cursor = kwargs.get("cursor")
+        page = as_page(await f(*args, **kwargs))
+        res = select_users(page.query)
+        batch = batch_keys(kwargs)
+        if batch:
+            column, keys = batch
+            result = await kwargs["db"].execute(res.where(column.in_(keys)))
+            content = batch_response("users", result.all(), column, keys)
+        else:
+            result = await kwargs["db"].execute(paginate(res, USER_KEY, False, limit, offset, cursor))
+            content = page_response("users", result.all(), USER_KEY, limit, offset, cursor, page.total)
+        content["users"] = user_dicts(content["users"])
+        return ORJSONResponse(content)
     return wrapper
 
 
@@ -38,25 +98,26 @@ def create_user(data: schemas.UserIn, db: Session = Depends(get_db)):
 
 
 @users.get("/users/{username}", response_model=schemas.UserOut)
-def get_user_by_username(username: str, db: Session = Depends(get_db)):
+def get_user_by_username(username: str, request: Request, response: Response, db: Session = Depends(get_read_db)):
     """Retrieve a user by username."""
     user = db.query(models.User).filter(models.User.username == username).first()
     if user is None:
         raise errors.UserNotFound
-    return user
+    return not_modified(request, response, user.etag) or user
 
 
-@users.get("/users", response_model=schemas.UserPagination)
+@users.get("/users", response_model=Union[schemas.UserPagination, schemas.UserBatch])
 @paginated_users
-def retrieve_all_users(db: Session = Depends(get_db), limit: int = 10, offset: int = 0):
-    """Retrieve all users."""
-    return models.User.select_all(db)
+def retrieve_all_users(db: Session = Depends(get_read_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None,
+                       ids: Optional[str] = None, usernames: Optional[str] = None):
+    """Retrieve all users, or users with comma separated ids or usernames."""
+    return Page(models.User.select_all(db), None if ids or usernames else table_count(db, models.User))
 
 
 @users.get("/me", response_model=schemas.UserOut)
-def get_current_user(current_user: models.User = Depends(models.User.verify_access_token)):
+def get_current_user(request: Request, response: Response, current_user: models.User = Depends(models.User.verify_access_token)):
     """Retrieve the authenticated user."""
-    return current_user
+    return not_modified(request, response, current_user.etag) or current_user
 
 
 @users.put("/me", response_model=schemas.UserOut)
@@ -69,4 +130,28 @@ def update_user(data: schemas.UserUpdate, db: Session = Depends(get_db), current
 
     current_user.update(data.dict())
     db.commit()
-    return current_user 
+    return current_user
+
+
+@async_users.get("/users/{username}", response_model=schemas.UserOut)
+async def get_user_by_username_async(username: str, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """Retrieve a user by username."""
+    result = await db.execute(sqla.select(models.User).where(models.User.username == username))
+    user = result.scalars().first()
+    if user is None:
+        raise errors.UserNotFound
+    return not_modified(request, response, user.etag) or user
+
+
+@async_users.get("/users", response_model=Union[schemas.UserPagination, schemas.UserBatch])
+@async_paginated_users
+async def retrieve_all_users_async(db: AsyncSession = Depends(get_async_db), limit: int = 10, offset: int = 0, cursor: Optional[str] = None,
+                                   ids: Optional[str] = None, usernames: Optional[str] = None):
+    """Retrieve all users, or users with comma separated ids or usernames."""
+    return Page(sqla.select(models.User), None if ids or usernames else await async_table_count(db, models.User))
+
+
+@async_users.get("/me", response_model=schemas.UserOut)
+async def get_current_user_async(request: Request, response: Response, current_user: models.User = Depends(models.User.verify_access_token_async)):
+    """Retrieve the authenticated user."""
+    return not_modified(request, response, current_user.etag) or current_user
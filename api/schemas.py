@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, StrictInt
 
 
 class UserIn(BaseModel):
@@ -19,6 +19,9 @@ class UserOut(BaseModel):
     about_me: Optional[str] = ""
     last_seen: datetime 
     member_since: datetime
+    followers_count: int = 0
+    following_count: int = 0
+    posts_count: int = 0
     
     class Config:
         orm_mode = True
@@ -35,6 +38,9 @@ class Pagination(BaseModel):
     """Pydantic model to validate 'pagination' query data."""
     limit: int 
     offset: int 
+    cursor: Optional[str]
+    next_cursor: Optional[str]
+    total: Optional[int]
 
 
 class UserPagination(BaseModel):
@@ -43,6 +49,12 @@ class UserPagination(BaseModel):
     pagination: Pagination
 
 
+class UserBatch(BaseModel):
+    """Pydantic model to validate users requested by ids or usernames."""
+    users: list[UserOut]
+    missing: list[Union[StrictInt, str]]
+
+
 class Token(BaseModel):
     """Pydantic model to validate 'token' data."""
     access_token: str 
@@ -83,3 +95,9 @@ class PostPagination(BaseModel):
     """Pydantic model to validate 'post' pagination data."""
     posts: list[PostOut]
     pagination: Pagination
+
+
+class PostBatch(BaseModel):
+    """Pydantic model to validate posts requested by ids."""
+    posts: list[PostOut]
+    missing: list[int]
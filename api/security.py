@@ -1,15 +1,188 @@
+from base64 import b64decode, b64encode, urlsafe_b64decode, urlsafe_b64encode
+from calendar import timegm
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from threading import BoundedSemaphore, Lock
+from typing import NamedTuple, Optional
+import binascii
 import hashlib
+import hmac
+import multiprocessing
 import secrets
+import struct
 
+from . import errors
+from config import settings
 
-def generate_password_hash(password: str, algorithm = hashlib.md5) -> str:
+
+class Hasher:
+    """Password hasher interface.
+
+    Hashes are stored as '<algorithm>$<parameters>$<salt>$<hash>' so that
+    they can be verified after default algorithm or cost are changed.
+    """
+    algorithm: str
+
+    def __init__(self, cost: int):
+        self.cost = cost
+
+    def hash(self, password: str) -> str:
+        """Create password hash from raw string."""
+        raise NotImplementedError
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check if password matches hash."""
+        raise NotImplementedError
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Check if hash was created with other parameters than configured."""
+        return False
+
+
+class MD5Hasher(Hasher):
+    """Legacy salted MD5, stored as '<salt>$<hash>' without algorithm tag."""
+    algorithm = "md5"
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_urlsafe(5)
+        hash = hashlib.md5(f"{password}{salt}".encode("utf-8")).hexdigest()
+        return f"{salt}${hash}"
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        salt, hash = password_hash.split("$")
+        return hmac.compare_digest(hash, hashlib.md5(f"{password}{salt}".encode("utf-8")).hexdigest())
+
+
+class PBKDF2Hasher(Hasher):
+    """PBKDF2-HMAC-SHA256, cost is the number of iterations."""
+    algorithm = "pbkdf2_sha256"
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(16)
+        hash = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, self.cost)
+        return f"{self.algorithm}${self.cost}${b64encode(salt).decode()}${b64encode(hash).decode()}"
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        _, iterations, salt, hash = password_hash.split("$")
+        expected = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), b64decode(salt), int(iterations))
+        return hmac.compare_digest(b64decode(hash), expected)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return int(password_hash.split("$")[1]) != self.cost
+
+
+class ScryptHasher(Hasher):
+    """Memory-hard scrypt, cost is log2 of the CPU/memory cost parameter N."""
+    algorithm = "scrypt"
+    block_size = 8
+    parallelism = 1
+
+    def hash(self, password: str) -> str:
+        salt = secrets.token_bytes(16)
+        hash = self._scrypt(password, salt, self.cost)
+        return f"{self.algorithm}${self.cost}${b64encode(salt).decode()}${b64encode(hash).decode()}"
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        _, cost, salt, hash = password_hash.split("$")
+        return hmac.compare_digest(b64decode(hash), self._scrypt(password, b64decode(salt), int(cost)))
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return int(password_hash.split("$")[1]) != self.cost
+
+    def _scrypt(self, password: str, salt: bytes, cost: int) -> bytes:
+        n = 2 ** cost
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=self.block_size,
+                              p=self.parallelism, maxmem=256 * n * self.block_size, dklen=32)
+
+
+HASHERS = {hasher.algorithm: hasher for hasher in (MD5Hasher, PBKDF2Hasher, ScryptHasher)}
+
+_pool = None
+_pool_lock = Lock()
+_slots = BoundedSemaphore(settings.password_hash_concurrency)
+
+
+def get_hasher(password_hash: str = None) -> Hasher:
+    """Return hasher which created password hash, or configured one."""
+    algorithm = settings.password_hash_algorithm
+    if password_hash is not None:
+        algorithm = password_hash.split("$")[0]
+        if algorithm not in HASHERS:
+            algorithm = MD5Hasher.algorithm
+    return HASHERS[algorithm](settings.password_hash_cost)
+
+
+def run_bounded(function, *args):
+    """Run CPU heavy function on the hashing process pool.
+
+    At most 'password_hash_concurrency' calls are queued for the pool at a
+    time, callers over the limit wait up to 'password_hash_timeout' seconds
+    and get 503 Service Unavailable after that. With 'password_hash_workers'
+    set to 0 function runs in calling thread.
+    """
+    global _pool
+    if settings.password_hash_workers == 0:
+        return function(*args)
+    if not _slots.acquire(timeout=settings.password_hash_timeout):
+        raise errors.ServiceUnavailable("Too many concurrent logins, try again later")
+    try:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(settings.password_hash_workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _pool.submit(function, *args).result()
+    finally:
+        _slots.release()
+
+
+def generate_password_hash(password: str) -> str:
     """Create password hash from raw string."""
-    salt = secrets.token_urlsafe(5)
-    hash = algorithm(f"{password}{salt}".encode("utf-8")).hexdigest()
-    return f"{salt}${hash}" 
+    return run_bounded(get_hasher().hash, password)
 
 
-def check_password_hash(password_hash: str, password: str, algorithm = hashlib.md5) -> bool:
+def check_password_hash(password_hash: str, password: str) -> bool:
     """Check is password is valid."""
-    salt, hash = password_hash.split("$")
-    return hash == algorithm(f"{password}{salt}".encode("utf-8")).hexdigest()
+    return run_bounded(get_hasher(password_hash).verify, password_hash, password)
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """Check if password hash should be upgraded to configured algorithm or cost."""
+    hasher = get_hasher(password_hash)
+    return hasher.algorithm != settings.password_hash_algorithm or hasher.needs_rehash(password_hash)
+
+
+class AccessTokenClaims(NamedTuple):
+    """Payload of signed access token."""
+    user_id: int
+    expiration: datetime
+    token_id: int
+
+
+def _urlsafe_encode(data: bytes) -> str:
+    return urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(settings.secret_key.encode("utf-8"), payload, hashlib.sha256).digest()[:16]
+
+
+def sign_access_token(user_id: int, expiration: datetime) -> str:
+    """Create self-describing access token signed with 'secret_key'.
+
+    Payload is packed binary user id, expiration timestamp and random token
+    id, so token fits in 64 characters.
+    """
+    payload = struct.pack(">QQQ", user_id, timegm(expiration.utctimetuple()), secrets.randbits(64))
+    return f"{_urlsafe_encode(payload)}.{_urlsafe_encode(_sign(payload))}"
+
+
+def read_access_token(access_token: str) -> Optional[AccessTokenClaims]:
+    """Return claims of signed access token, None if token is malformed or forged."""
+    try:
+        payload, signature = (urlsafe_b64decode(part + "=" * (-len(part) % 4)) for part in access_token.split("."))
+        user_id, expiration, token_id = struct.unpack(">QQQ", payload)
+    except (ValueError, binascii.Error, struct.error):
+        return None
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    return AccessTokenClaims(user_id, datetime.utcfromtimestamp(expiration), token_id)
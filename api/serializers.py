@@ -0,0 +1,42 @@
+import orjson
+import sqlalchemy.orm as sqla_orm
+
+from . import models, schemas
+
+# Options 'ORJSONResponse' renders with, for bodies built outside of it.
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+# Columns are selected in the order of response schema fields, so rows can be
+# zipped into response dicts without building ORM objects or Pydantic models.
+USER_COLUMNS = tuple(getattr(models.User, field) for field in schemas.UserOut.__fields__)
+POST_COLUMNS = tuple(getattr(models.Post, field) for field in schemas.PostOut.__fields__ if field != "author")
+USER_FIELDS = tuple(column.key for column in USER_COLUMNS)
+POST_FIELDS = tuple(column.key for column in POST_COLUMNS)
+
+
+def with_columns(query, *columns):
+    """Replace selected entities of ORM query or select statement with columns."""
+    if isinstance(query, sqla_orm.Query):
+        return query.with_entities(*columns)
+    return query.with_only_columns(*columns)
+
+
+def select_users(query):
+    """Select 'UserOut' columns of users query."""
+    return with_columns(query, *USER_COLUMNS)
+
+
+def select_posts(query):
+    """Select 'PostOut' columns of posts query, followed by author columns."""
+    return with_columns(query, *POST_COLUMNS, *USER_COLUMNS).join(models.Post.author)
+
+
+def user_dicts(rows) -> list:
+    """Build 'UserOut' dicts out of rows fetched with 'select_users'."""
+    return [dict(zip(USER_FIELDS, row)) for row in rows]
+
+
+def post_dicts(rows) -> list:
+    """Build 'PostOut' dicts out of rows fetched with 'select_posts'."""
+    size = len(POST_FIELDS)
+    return [dict(zip(POST_FIELDS, row[:size]), author=dict(zip(USER_FIELDS, row[size:]))) for row in rows]
@@ -0,0 +1,52 @@
+from threading import Event, Thread
+from time import perf_counter
+from typing import Callable
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run function every 'interval' seconds in a daemon thread.
+
+    Function should return number of processed rows, it is logged together
+    with run duration and kept in 'last_result' and 'last_duration'.
+    """
+
+    def __init__(self, interval: float, function: Callable):
+        self.interval = interval
+        self.function = function
+        self.last_result = None
+        self.last_duration = None
+        self._stopped = Event()
+        self._thread = None
+
+    def start(self):
+        """Start running task in background."""
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, name=self.function.__name__, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop background thread and run task for the last time."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.run_once()
+
+    def run_once(self):
+        """Run task, logging instead of raising errors."""
+        start = perf_counter()
+        try:
+            self.last_result = self.function()
+        except Exception:
+            logger.exception("Periodic task %s failed", self.function.__name__)
+            return
+        self.last_duration = perf_counter() - start
+        logger.info("Periodic task %s processed %s rows in %.1f ms",
+                    self.function.__name__, self.last_result, self.last_duration * 1000)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.run_once()
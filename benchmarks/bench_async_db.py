@@ -0,0 +1,45 @@
+"""Compare read throughput of sync and asyncio database routes.
+
+    python -m benchmarks.bench_async_db [--requests N] [--concurrency N]
+"""
+import os
+
+os.environ.setdefault("ASYNC_DATABASE", "1")
+
+from .common import print_result, run_load, seed_database  # noqa: E402
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    from api import create_app
+    from api.database import pool_stats
+    from config import settings
+
+    access_token = seed_database()
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    def workload(i):
+        return [
+            ("GET", "/posts?limit=20", {}, b""),
+            ("GET", f"/users/user{i % 100 + 1}", {}, b""),
+            ("GET", "/me/following", headers, b""),
+            ("GET", f"/users/{i % 100 + 1}/posts", {}, b""),
+        ][i % 4]
+
+    for mode in ("sync", "async"):
+        settings.async_database = mode == "async"
+        app = create_app()
+        result = asyncio.run(run_load(app, workload, args.requests, args.concurrency))
+        print_result(f"{mode} reads (concurrency {args.concurrency})", result)
+        print(f"{'':<40} pool {pool_stats().get(mode)}")
+
+
+if __name__ == "__main__":
+    main()
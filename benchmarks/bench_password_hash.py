@@ -0,0 +1,41 @@
+"""Measure password verification cost and login throughput per hashing algorithm.
+
+    python -m benchmarks.bench_password_hash [--requests N] [--concurrency N]
+"""
+from .common import print_result, run_load, seed_database, timeit
+
+import argparse
+import asyncio
+
+ALGORITHMS = [("md5", 0), ("pbkdf2_sha256", 260000), ("scrypt", 14)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    from api import create_app
+    from api.security import check_password_hash, generate_password_hash
+    from config import settings
+
+    body = b"username=user1&password=password"
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    for algorithm, cost in ALGORITHMS:
+        settings.password_hash_algorithm = algorithm
+        settings.password_hash_cost = cost
+        password_hash = generate_password_hash("password")
+        result = timeit(lambda: check_password_hash(password_hash, "password"), repeat=20)
+        print_result(f"{algorithm} verify", result)
+
+        seed_database(users=10, posts_per_user=0, follows_per_user=0)
+        app = create_app()
+        result = asyncio.run(run_load(app, lambda i: ("POST", "/tokens", headers, body),
+                                      args.requests, args.concurrency))
+        print_result(f"{algorithm} login (concurrency {args.concurrency})", result)
+
+
+if __name__ == "__main__":
+    main()
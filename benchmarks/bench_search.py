@@ -0,0 +1,58 @@
+"""Compare full-text post search with a LIKE scan over a synthetic corpus.
+
+    python -m benchmarks.bench_search [--posts N] [--requests N] [--concurrency N]
+"""
+from .common import print_result, run_load, seed_database, timeit
+
+import argparse
+import asyncio
+import random
+
+WORDS = ["fastapi", "python", "database", "index", "search", "async", "cache", "token", "query", "model",
+         "router", "schema", "deploy", "docker", "postgres", "sqlite", "latency", "throughput", "profile", "worker"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    import sqlalchemy as sqla
+
+    from api import create_app
+    from api.database import SessionLocal, engine
+    from api.models import Post, PostSearch
+
+    seed_database(posts_per_user=0)
+    rng = random.Random(0)
+    vocabulary = WORDS + [f"word{i}" for i in range(5000)]
+    posts = [{"title": " ".join(rng.choices(vocabulary, k=4)), "content": " ".join(rng.choices(vocabulary, k=80)),
+              "author_id": i % 100 + 1} for i in range(args.posts)]
+    with engine.begin() as connection:
+        connection.execute(sqla.insert(Post), posts)
+    with SessionLocal() as db:
+        PostSearch.rebuild(db)
+        db.commit()
+
+        dialect = PostSearch.dialect(db)
+        terms = [["search", "index"], ["word42"], ["docker", "postgres", "latency"]]
+        result = timeit(lambda: db.execute(PostSearch.select(dialect, rng.choice(terms)).limit(10)).all(), repeat=200)
+        print_result("full-text search", result)
+
+        def like_scan():
+            criteria = [sqla.or_(Post.title.like(f"%{term}%"), Post.content.like(f"%{term}%"))
+                        for term in rng.choice(terms)]
+            db.execute(sqla.select(Post).where(*criteria).limit(10)).all()
+        print_result("LIKE scan", timeit(like_scan, repeat=200))
+
+    def workload(i):
+        return "GET", f"/posts/search?q={'+'.join(terms[i % len(terms)])}", {}, b""
+
+    result = asyncio.run(run_load(create_app(), workload, args.requests, args.concurrency))
+    print_result(f"GET /posts/search (concurrency {args.concurrency})", result)
+
+
+if __name__ == "__main__":
+    main()
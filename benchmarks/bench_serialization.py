@@ -0,0 +1,56 @@
+"""Compare per-page cost of response_model serialization with the row-based fast path.
+
+    python -m benchmarks.bench_serialization [--limit N] [--repeat N]
+"""
+from .common import print_result, seed_database, timeit
+
+import argparse
+import json
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import ORJSONResponse
+    from sqlalchemy.orm import joinedload
+
+    from api import schemas
+    from api.database import SessionLocal
+    from api.models import Post
+    from api.pagination import page_response
+    from api.serializers import post_dicts, select_posts
+
+    seed_database()
+    # Same pagination object the routes build, for a single page.
+    pagination = page_response("posts", [], (), args.limit, 0, None)["pagination"]
+    order = (Post.created_at.desc(), Post.post_id.desc())
+
+    with SessionLocal() as db:
+        def load_objects():
+            db.expunge_all()
+            return db.query(Post).options(joinedload(Post.author)).order_by(*order).limit(args.limit).all()
+
+        def load_rows():
+            return select_posts(db.query(Post)).order_by(*order).limit(args.limit).all()
+
+        def validate(posts):
+            content = schemas.PostPagination.parse_obj({"posts": posts, "pagination": pagination})
+            return json.dumps(jsonable_encoder(content)).encode("utf-8")
+
+        def fast(rows):
+            return ORJSONResponse({"posts": post_dicts(rows), "pagination": pagination}).body
+
+        objects, rows = load_objects(), load_rows()
+        assert json.loads(validate(objects)) == json.loads(fast(rows))
+        print_result(f"response_model, {args.limit} posts", timeit(lambda: validate(objects), args.repeat))
+        print_result(f"fast path, {args.limit} posts", timeit(lambda: fast(rows), args.repeat))
+        print_result("load + response_model", timeit(lambda: validate(load_objects()), args.repeat))
+        print_result("load + fast path", timeit(lambda: fast(load_rows()), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Shared helpers for benchmarks.
+
+Benchmarks run against a throwaway SQLite database unless DATABASE_URL is
+set, so this module must be imported before anything from 'api' or 'config'.
+"""
+from time import perf_counter
+from urllib.parse import urlsplit
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.sqlite')}")
+os.environ.setdefault("REFRESH_TOKEN_IN_BODY", "1")
+os.environ.setdefault("USE_CORS", "0")
+
+
+async def asgi_request(app, method: str, url: str, headers: dict = None, body: bytes = b"") -> int:
+    """Send a single request to ASGI app in process and return response status."""
+    url = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "root_path": "",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    status = None
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # Client never disconnects, this only blocks disconnect listeners.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def run_load(app, workload, total: int, concurrency: int) -> dict:
+    """Replay 'total' requests produced by workload(i) with given concurrency.
+
+    workload must return (method, url, headers, body) tuple.
+    """
+    latencies = []
+    errors = 0
+    queue = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in queue:
+            method, url, headers, body = workload(i)
+            start = perf_counter()
+            status = await asgi_request(app, method, url, headers, body)
+            latencies.append(perf_counter() - start)
+            if status >= 400:
+                errors += 1
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = perf_counter() - start
+    return summarize(latencies, elapsed, errors)
+
+
+def percentile(values: list, p: float) -> float:
+    """Return p-th percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def summarize(latencies: list, elapsed: float, errors: int = 0) -> dict:
+    """Summarize request latencies in milliseconds and throughput."""
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def timeit(function, repeat: int) -> dict:
+    """Call function 'repeat' times and summarize call latencies."""
+    latencies = []
+    start = perf_counter()
+    for _ in range(repeat):
+        call_start = perf_counter()
+        function()
+        latencies.append(perf_counter() - call_start)
+    return summarize(latencies, perf_counter() - start)
+
+
+def print_result(name: str, result: dict):
+    """Print one benchmark result line."""
+    print(f"{name:<40} {result['throughput']:>10.1f}/s  p50 {result['p50_ms']:>8.2f}ms  "
+          f"p95 {result['p95_ms']:>8.2f}ms  p99 {result['p99_ms']:>8.2f}ms  errors {result['errors']}")
+
+
+def seed_database(users: int = 100, posts_per_user: int = 20, follows_per_user: int = 10) -> str:
+    """Create schema and fill it with a small dataset, return access token of first user."""
+    from datetime import datetime, timedelta
+    import secrets
+
+    import sqlalchemy as sqla
+
+    from api.database import Base, SessionLocal, engine
+    from api.models import Post, PostSearch, Timeline, Token, User, followers
+    from api.security import generate_password_hash
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    password_hash = generate_password_hash("password")
+    access_token = secrets.token_urlsafe()
+    rows = {
+        User: [
+            {"user_id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": password_hash,
+             "about_me": "", "last_seen": now, "member_since": now}
+            for i in range(1, users + 1)
+        ],
+        Post: [
+            {"title": f"Post {i}", "content": "Lorem ipsum dolor sit amet. " * 10,
+             "created_at": now - timedelta(minutes=i), "author_id": i % users + 1}
+            for i in range(users * posts_per_user)
+        ],
+        followers: [
+            {"follower_id": i, "followed_id": (i + j) % users + 1}
+            for i in range(1, users + 1) for j in range(1, min(follows_per_user, users - 1) + 1)
+        ],
+        Token: [{
+            "user_id": 1, "access_token": access_token, "access_expiration": now + timedelta(days=1),
+            "refresh_token": secrets.token_urlsafe(), "refresh_expiration": now + timedelta(days=7)
+        }],
+    }
+    with engine.begin() as connection:
+        for table, values in rows.items():
+            if values:
+                connection.execute(sqla.insert(table), values)
+    with SessionLocal() as db:
+        User.reconcile_counters(db)
+        PostSearch.rebuild(db)
+        Timeline.backfill_all(db)
+        db.commit()
+    return access_token
@@ -0,0 +1,189 @@
+"""Run microbenchmarks and a mixed load test, saving results as JSON.
+
+    python -m benchmarks.suite [--output FILE] [--compare FILE] [--requests N] [--concurrency N]
+
+Results of two commits are compared by saving a run of each and passing
+the older one to '--compare'.
+"""
+from .common import print_result, run_load, seed_database, timeit
+
+from datetime import datetime
+from urllib.parse import urlencode
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+
+USERS = 100
+POSTS_PER_USER = 20
+FOLLOWS_PER_USER = 10
+
+# Share of each request kind in the mixed workload, out of 20 requests.
+WORKLOAD = ["feed"] * 12 + ["create_post"] * 4 + ["follow"] * 3 + ["login"]
+
+
+def git_commit() -> str:
+    """Return commit the benchmark runs against, with a mark if tree is dirty."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def create_tokens() -> dict:
+    """Create access token of every seeded user, return tokens by user id."""
+    from datetime import timedelta
+    import secrets
+
+    import sqlalchemy as sqla
+
+    from api.database import engine
+    from api.models import Token
+
+    now = datetime.utcnow()
+    tokens = {user_id: secrets.token_urlsafe() for user_id in range(1, USERS + 1)}
+    with engine.begin() as connection:
+        connection.execute(sqla.insert(Token), [{
+            "user_id": user_id, "access_token": access_token, "access_expiration": now + timedelta(days=1),
+            "refresh_token": secrets.token_urlsafe(), "refresh_expiration": now + timedelta(days=7)
+        } for user_id, access_token in tokens.items()])
+    return tokens
+
+
+def microbenchmarks(access_token: str, repeat: int) -> dict:
+    """Time hot functions in isolation."""
+    from fastapi.responses import ORJSONResponse
+
+    from api import schemas
+    from api.database import SessionLocal
+    from api.models import Post, User, token_cache
+    from api.pagination import encode_cursor, page_response, paginate
+    from api.security import check_password_hash, generate_password_hash
+    from api.serializers import post_dicts, select_posts
+
+    results = {}
+    password_hash = generate_password_hash("password")
+    results["check_password_hash"] = timeit(lambda: check_password_hash(password_hash, "password"),
+                                            max(1, repeat // 50))
+
+    columns = (Post.created_at, Post.post_id)
+    with SessionLocal() as db:
+        results["verify_access_token_cached"] = timeit(lambda: User.verify_access_token(access_token, db), repeat)
+
+        def verify_uncached():
+            token_cache.clear()
+            User.verify_access_token(access_token, db)
+
+        results["verify_access_token_uncached"] = timeit(verify_uncached, repeat)
+
+        def page(offset=0, cursor=None):
+            query = paginate(select_posts(db.query(Post)), columns, True, 20, offset, cursor)
+            return page_response("posts", query.all(), columns, 20, offset, cursor)
+
+        middle = db.query(Post).order_by(Post.created_at.desc(), Post.post_id.desc()).offset(1000).first()
+        cursor = encode_cursor(middle.created_at, middle.post_id)
+        results["paginate_first_page"] = timeit(page, repeat)
+        results["paginate_offset_1000"] = timeit(lambda: page(offset=1000), repeat)
+        results["paginate_cursor_1000"] = timeit(lambda: page(cursor=cursor), repeat)
+
+        rows = select_posts(db.query(Post)).order_by(*(column.desc() for column in columns)).limit(100).all()
+        objects = post_dicts(rows)
+        results["post_out_validate_100"] = timeit(lambda: [schemas.PostOut.parse_obj(post) for post in objects],
+                                                  repeat)
+        results["post_out_fast_path_100"] = timeit(lambda: ORJSONResponse({"posts": post_dicts(rows)}).body, repeat)
+    return results
+
+
+def load_test(tokens: dict, requests: int, concurrency: int) -> dict:
+    """Replay mixed workload of feed reads, posting, follows and logins."""
+    from api import create_app
+
+    app = create_app()
+    json_headers = {"Content-Type": "application/json"}
+    form_headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    follow_count = 0
+
+    def request(kind: str, i: int):
+        nonlocal follow_count
+        user_id = i % USERS + 1
+        headers = {"Authorization": f"Bearer {tokens[user_id]}"}
+        if kind == "feed":
+            return "GET", "/me/feed?limit=20", headers, b""
+        if kind == "create_post":
+            body = json.dumps({"title": f"Benchmark post {i}", "content": "Lorem ipsum dolor sit amet. " * 10})
+            return "POST", "/posts", {**headers, **json_headers}, body.encode()
+        if kind == "follow":
+            # Seeded user i follows users i + 2 to i + FOLLOWS_PER_USER + 1,
+            # every follow request picks a pair that is not following yet.
+            follower = follow_count % USERS + 1
+            followed = (follower + FOLLOWS_PER_USER + 1 + follow_count // USERS) % USERS + 1
+            follow_count += 1
+            return "POST", f"/me/following/{followed}", {"Authorization": f"Bearer {tokens[follower]}"}, b""
+        body = urlencode({"username": f"user{user_id}", "password": "password"}).encode()
+        return "POST", "/tokens", form_headers, body
+
+    results = {}
+    for kind in sorted(set(WORKLOAD)):
+        kind_requests = max(1, requests * WORKLOAD.count(kind) // len(WORKLOAD))
+        results[f"load_{kind}"] = asyncio.run(run_load(app, lambda i: request(kind, i), kind_requests, concurrency))
+    results["load_mixed"] = asyncio.run(run_load(app, lambda i: request(WORKLOAD[i % len(WORKLOAD)], i),
+                                                 requests, concurrency))
+    return results
+
+
+def compare(results: dict, baseline: dict):
+    """Print throughput and p95 latency change against baseline run."""
+    print(f"\nCompared to {baseline['commit']} ({baseline['timestamp']}):")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if not before or not before["throughput"] or not before["p95_ms"]:
+            continue
+        throughput = (result["throughput"] / before["throughput"] - 1) * 100
+        p95 = (result["p95_ms"] / before["p95_ms"] - 1) * 100
+        print(f"{name:<40} throughput {throughput:>+7.1f}%  p95 {p95:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--output", help="save results as JSON to this file")
+    parser.add_argument("--compare", help="compare with results saved by an earlier run")
+    args = parser.parse_args()
+
+    from config import settings
+
+    access_token = seed_database(USERS, POSTS_PER_USER, FOLLOWS_PER_USER)
+    tokens = create_tokens()
+
+    results = microbenchmarks(access_token, args.repeat)
+    results.update(load_test(tokens, args.requests, args.concurrency))
+    for name, result in results.items():
+        print_result(name, result)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": settings.database_url.split(":", 1)[0],
+        "password_hash_algorithm": settings.password_hash_algorithm,
+        "arguments": vars(args),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,70 @@
-from pydantic import BaseSettings
+from typing import Optional
+
+from pydantic import BaseSettings, validator
 
 
 class Settings(BaseSettings):
     """Application config."""
     debug: bool = False
     database_url: str = "sqlite:///db.sqlite"
+    database_replica_urls: list[str] = []
+    replica_retry_interval: int = 30
+    read_your_writes_window: int = 5
+    read_your_writes_size: int = 10000
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    database_pool_recycle: int = -1
+    database_pool_pre_ping: bool = False
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_mmap_size: int = 268435456
+    sqlite_busy_timeout: int = 5000
+    async_database: bool = False
+    async_database_url: Optional[str] = None
     access_token_expire_minutes: int = 15
     refresh_token_expire_days: int = 7
     refresh_token_in_cookie: bool = True
     refresh_token_in_body: bool 
     use_cors: bool
+    use_metrics: bool = False
+    metrics_token: str = ""
+    sql_profiling: bool = False
+    sql_profiling_repeat_threshold: int = 5
+    rate_limiting: bool = False
+    rate_limits: dict[str, str] = {"login": "10/60", "write": "60/60", "read": "600/60"}
+    rate_limit_backend: str = "memory"
+    rate_limit_store_size: int = 100000
+    rate_limit_sweep_interval: int = 600
+    max_page_limit: int = 100
+    max_batch_size: int = 100
+    export_batch_size: int = 1000
+    count_cache_ttl: int = 60
+    exact_count_threshold: int = 100000
+    feed_fanout_limit: int = 10000
+    feed_backfill_size: int = 100
+    feed_timeline_size: int = 1000
+    feed_trim_interval: int = 600
+    token_cache_size: int = 10000
+    token_cache_ttl: int = 60
+    last_seen_granularity: int = 60
+    last_seen_flush_interval: int = 60
+    password_hash_algorithm: str = "scrypt"
+    password_hash_cost: int = 14
+    password_hash_workers: int = 2
+    password_hash_concurrency: int = 8
+    password_hash_timeout: float = 5
+    token_sweep_interval: int = 600
+    token_sweep_batch_size: int = 1000
+    signed_access_tokens: bool = False
+    secret_key: str = ""
+
+    @validator("secret_key", always=True)
+    def secret_key_required(cls, secret_key, values):
+        """Signed access tokens can't be verified without a secret."""
+        if values.get("signed_access_tokens") and not secret_key:
+            raise ValueError("secret_key is required for signed access tokens")
+        return secret_key
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,67 @@
+import click
+
+from api.database import SessionLocal
+from api.generator import DatasetGenerator
+from api.importer import Importer, read_records
+from api.models import User
+
+
+def progress(name: str, count: int, elapsed: float):
+    """Report rows inserted into table so far."""
+    click.echo(f"{name}: {count} rows, {count / elapsed if elapsed else 0:.0f} rows/s")
+
+
+@click.group()
+def cli():
+    """Blog API management commands."""
+
+
+@cli.command("reconcile-counters")
+@click.option("--batch-size", default=1000, show_default=True, help="Users updated per transaction.")
+def reconcile_counters(batch_size: int):
+    """Recompute users follower, following and post counters."""
+    with SessionLocal() as db:
+        fixed = User.reconcile_counters(db, batch_size)
+    click.echo(f"Fixed counters of {fixed} users.")
+
+
+@cli.command("import")
+@click.option("--users", "users_path", type=click.Path(exists=True, dir_okay=False), help="Users NDJSON or CSV file.")
+@click.option("--posts", "posts_path", type=click.Path(exists=True, dir_okay=False), help="Posts NDJSON or CSV file.")
+@click.option("--follows", "follows_path", type=click.Path(exists=True, dir_okay=False), help="Follows NDJSON or CSV file.")
+@click.option("--batch-size", default=5000, show_default=True, help="Rows inserted per transaction.")
+@click.option("--workers", default=4, show_default=True, help="Password hashing processes, 0 hashes inline.")
+def import_data(users_path: str, posts_path: str, follows_path: str, batch_size: int, workers: int):
+    """Bulk load users, posts and follow edges from NDJSON or CSV files."""
+    with SessionLocal() as db, Importer(db, batch_size, workers, progress) as importer:
+        if users_path:
+            importer.import_users(read_records(users_path))
+        if posts_path:
+            importer.import_posts(read_records(posts_path))
+        if follows_path:
+            importer.import_follows(read_records(follows_path))
+        importer.finish()
+    click.echo("Import finished.")
+
+
+@cli.command("generate")
+@click.option("--users", default=10000, show_default=True, help="Number of users.")
+@click.option("--posts", default=100000, show_default=True, help="Number of posts.")
+@click.option("--follows-per-user", default=20, show_default=True, help="Mean number of users followed by a user.")
+@click.option("--tokens", default=0, show_default=True, help="Users given a valid access token.")
+@click.option("--days", default=365, show_default=True, help="Days posts are spread over.")
+@click.option("--exponent", default=1.1, show_default=True, help="Zipf exponent of followers and posts per user.")
+@click.option("--seed", default=0, show_default=True, help="Random seed, same seed generates same rows.")
+@click.option("--batch-size", default=5000, show_default=True, help="Rows inserted per transaction.")
+def generate(users: int, posts: int, follows_per_user: int, tokens: int, days: int, exponent: float, seed: int,
+             batch_size: int):
+    """Fill empty database with synthetic users, posts, follow edges and tokens."""
+    generator = DatasetGenerator(users, posts, follows_per_user, tokens, days, seed, exponent)
+    with SessionLocal() as db, Importer(db, batch_size, progress=progress) as importer:
+        counts = generator.load(importer)
+    click.echo(f"Generated {counts['users']} users, {counts['posts']} posts, {counts['follows']} follows "
+               f"and {counts['tokens']} tokens.")
+
+
+if __name__ == "__main__":
+    cli()
@@ -29,6 +29,11 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+def include_name(name, type_, parent_names) -> bool:
+    """Hide full-text search objects, created with raw DDL, from autogenerate."""
+    return not (name or "").startswith(("posts_search", "ix_posts_search"))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -45,6 +50,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -68,7 +74,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_name=include_name
         )
 
         with context.begin_transaction():
@@ -0,0 +1,35 @@
+"""Add users follower, following and post counters.
+
+Revision ID: 4a7c2e91b3d6
+Revises: e6a3b9f2d418
+Create Date: 2026-10-18 14:02:17.388405
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7c2e91b3d6'
+down_revision = 'e6a3b9f2d418'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('followers_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('following_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('posts_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE users SET "
+        "followers_count = (SELECT count(*) FROM followers WHERE followers.followed_id = users.user_id), "
+        "following_count = (SELECT count(*) FROM followers WHERE followers.follower_id = users.user_id), "
+        "posts_count = (SELECT count(*) FROM posts WHERE posts.author_id = users.user_id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('posts_count')
+        batch_op.drop_column('following_count')
+        batch_op.drop_column('followers_count')
@@ -0,0 +1,30 @@
+"""Add users and posts updated at columns.
+
+Revision ID: 7f3d95c1a0e4
+Revises: c58d0e7f1b29
+Create Date: 2026-10-18 15:42:09.512876
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f3d95c1a0e4'
+down_revision = 'c58d0e7f1b29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('posts', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE users SET updated_at = member_since")
+    op.execute("UPDATE posts SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('posts') as batch_op:
+        batch_op.drop_column('updated_at')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,26 @@
+"""Add posts keyset pagination indexes.
+
+Revision ID: 8d2f4c1a9e07
+Revises: 3276f7e75833
+Create Date: 2026-10-18 10:12:31.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4c1a9e07'
+down_revision = '3276f7e75833'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_posts_created_at_post_id', 'posts', ['created_at', 'post_id'], unique=False)
+    op.create_index('ix_posts_author_id_created_at_post_id', 'posts', ['author_id', 'created_at', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_posts_author_id_created_at_post_id', table_name='posts')
+    op.drop_index('ix_posts_created_at_post_id', table_name='posts')
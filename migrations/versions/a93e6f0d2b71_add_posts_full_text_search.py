@@ -0,0 +1,33 @@
+"""Add posts full-text search index.
+
+Revision ID: a93e6f0d2b71
+Revises: 7f3d95c1a0e4
+Create Date: 2026-10-18 16:20:37.845112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93e6f0d2b71'
+down_revision = '7f3d95c1a0e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE posts_search USING fts5(title, content, tokenize='porter unicode61')")
+        op.execute("INSERT INTO posts_search(rowid, title, content) SELECT post_id, title, content FROM posts")
+    elif dialect == 'postgresql':
+        op.execute("CREATE INDEX ix_posts_search ON posts USING gin (to_tsvector('english', title || ' ' || content))")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE posts_search")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_posts_search', table_name='posts')
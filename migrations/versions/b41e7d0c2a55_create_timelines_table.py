@@ -0,0 +1,41 @@
+"""Create timelines table.
+
+Revision ID: b41e7d0c2a55
+Revises: 8d2f4c1a9e07
+Create Date: 2026-10-18 11:03:47.918260
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41e7d0c2a55'
+down_revision = '8d2f4c1a9e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('timelines',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['posts.post_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    # Only newest posts of every timeline are delivered, as the trim task keeps them.
+    op.execute(sa.text(
+        "INSERT INTO timelines (user_id, post_id) "
+        "SELECT follower_id, post_id FROM ("
+        "SELECT followers.follower_id, posts.post_id, row_number() OVER ("
+        "PARTITION BY followers.follower_id ORDER BY posts.created_at DESC, posts.post_id DESC) AS position "
+        "FROM followers JOIN posts ON posts.author_id = followers.followed_id"
+        ") AS delivered WHERE position <= :size"
+    ).bindparams(size=settings.feed_timeline_size))
+
+
+def downgrade() -> None:
+    op.drop_table('timelines')
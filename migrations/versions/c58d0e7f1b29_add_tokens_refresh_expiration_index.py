@@ -0,0 +1,24 @@
+"""Add tokens refresh expiration index.
+
+Revision ID: c58d0e7f1b29
+Revises: 4a7c2e91b3d6
+Create Date: 2026-10-18 15:10:44.120593
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58d0e7f1b29'
+down_revision = '4a7c2e91b3d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_tokens_refresh_expiration'), 'tokens', ['refresh_expiration'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tokens_refresh_expiration'), table_name='tokens')
@@ -0,0 +1,32 @@
+"""Create rate limits table.
+
+Revision ID: d7b2f05c6e13
+Revises: a93e6f0d2b71
+Create Date: 2026-10-18 18:02:11.530418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b2f05c6e13'
+down_revision = 'a93e6f0d2b71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('rate_limits',
+    sa.Column('bucket', sa.String(length=128), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.Column('allowed', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('bucket')
+    )
+    op.create_index(op.f('ix_rate_limits_updated_at'), 'rate_limits', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rate_limits_updated_at'), table_name='rate_limits')
+    op.drop_table('rate_limits')
@@ -0,0 +1,48 @@
+"""Add followers primary key and reverse index.
+
+Revision ID: e6a3b9f2d418
+Revises: b41e7d0c2a55
+Create Date: 2026-10-18 13:21:05.660914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a3b9f2d418'
+down_revision = 'b41e7d0c2a55'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Table is rebuilt to drop duplicate and incomplete edges before adding the key.
+    op.create_table('followers_new',
+    sa.Column('followed_id', sa.Integer(), nullable=False),
+    sa.Column('follower_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['followed_id'], ['users.user_id'], ),
+    sa.ForeignKeyConstraint(['follower_id'], ['users.user_id'], ),
+    sa.PrimaryKeyConstraint('follower_id', 'followed_id')
+    )
+    op.execute(
+        "INSERT INTO followers_new (followed_id, follower_id) "
+        "SELECT DISTINCT followed_id, follower_id FROM followers "
+        "WHERE followed_id IS NOT NULL AND follower_id IS NOT NULL"
+    )
+    op.drop_table('followers')
+    op.rename_table('followers_new', 'followers')
+    op.create_index('ix_followers_followed_id_follower_id', 'followers', ['followed_id', 'follower_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_followers_followed_id_follower_id', table_name='followers')
+    op.create_table('followers_old',
+    sa.Column('followed_id', sa.Integer(), nullable=True),
+    sa.Column('follower_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['followed_id'], ['users.user_id'], ),
+    sa.ForeignKeyConstraint(['follower_id'], ['users.user_id'], )
+    )
+    op.execute("INSERT INTO followers_old (followed_id, follower_id) SELECT followed_id, follower_id FROM followers")
+    op.drop_table('followers')
+    op.rename_table('followers_old', 'followers')
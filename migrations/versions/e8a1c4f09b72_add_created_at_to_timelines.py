@@ -0,0 +1,33 @@
+"""Add created_at to timelines.
+
+Revision ID: e8a1c4f09b72
+Revises: d7b2f05c6e13
+Create Date: 2026-10-18 18:42:09.316502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a1c4f09b72'
+down_revision = 'd7b2f05c6e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('timelines', sa.Column('created_at', sa.DateTime(), nullable=True))
+    op.execute(
+        "UPDATE timelines SET created_at = "
+        "(SELECT posts.created_at FROM posts WHERE posts.post_id = timelines.post_id)"
+    )
+    with op.batch_alter_table('timelines') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_timelines_user_id_created_at_post_id', 'timelines', ['user_id', 'created_at', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_timelines_user_id_created_at_post_id', table_name='timelines')
+    with op.batch_alter_table('timelines') as batch_op:
+        batch_op.drop_column('created_at')
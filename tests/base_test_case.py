@@ -2,7 +2,7 @@ import unittest
 from contextlib import contextmanager
 
 from fastapi.testclient import TestClient 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from api import create_app
@@ -32,6 +32,20 @@ def set_connection():
         db.close()
 
 
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
 class BaseTestCase(unittest.TestCase):
     def setUp(self):
         Base.metadata.create_all(bind=engine)
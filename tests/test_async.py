@@ -0,0 +1,150 @@
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from .base_test_case import BaseTestCase
+from api import create_app
+from api.database import async_database_url, get_async_db
+from api.pagination import table_counts
+from config import settings
+
+async_engine = create_async_engine("sqlite+aiosqlite:///testdb.sqlite", poolclass=NullPool)
+TestingAsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+class TestAsync(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        settings.async_database = True
+        try:
+            app = create_app()
+        finally:
+            settings.async_database = False
+        app.dependency_overrides = self.app.dependency_overrides
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        self.client = TestClient(app)
+
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        assert resp.status_code == 201
+        self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    def test_async_database_url(self):
+        assert async_database_url("sqlite:///db.sqlite") == "sqlite+aiosqlite:///db.sqlite"
+        assert async_database_url("postgresql://u:p@db/blog") == "postgresql+asyncpg://u:p@db/blog"
+
+    def test_read_routes_are_async(self):
+        endpoints = {}
+        for route in self.client.app.routes:
+            for method in getattr(route, "methods", []):
+                endpoints.setdefault((route.path, method), route.endpoint)
+        for path in ["/posts", "/users", "/me", "/me/following"]:
+            assert endpoints[(path, "GET")].__name__.endswith("_async")
+        assert not endpoints[("/posts", "POST")].__name__.endswith("_async")
+
+    def test_me(self):
+        resp = self.client.get("/me", headers=self.headers)
+        assert resp.status_code == 200
+        assert resp.json()["username"] == "bob"
+
+        resp = self.client.get("/me", headers={"Authorization": "Bearer x"})
+        assert resp.status_code == 401
+
+    def test_posts(self):
+        table_counts.clear()
+        for i in range(3):
+            data = {
+                "title": f"Post {i}",
+                "content": "Create restapi with FastAPI"
+            }
+            resp = self.client.post("/posts", headers=self.headers, json=data)
+            assert resp.status_code == 201
+
+        resp = self.client.get("/posts?limit=2")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [post["title"] for post in data["posts"]] == ["Post 2", "Post 1"]
+        assert data["posts"][0]["author"]["username"] == "bob"
+        assert data["pagination"]["total"] == 3
+
+        resp = self.client.get(f"/users/1/posts?cursor={data['pagination']['next_cursor']}")
+        assert resp.status_code == 200
+        assert [post["title"] for post in resp.json()["posts"]] == ["Post 0"]
+        assert resp.json()["pagination"]["total"] == 3
+
+        resp = self.client.get("/posts/1")
+        assert resp.status_code == 200
+        assert resp.json()["author"]["username"] == "bob"
+
+        resp = self.client.get("/posts/4")
+        assert resp.status_code == 404
+
+        resp = self.client.get("/posts/search?q=post")
+        assert resp.status_code == 200
+        assert len(resp.json()["posts"]) == 3
+
+        resp = self.client.get("/posts?ids=3,4,1")
+        assert resp.status_code == 200
+        assert [post["title"] for post in resp.json()["posts"]] == ["Post 2", "Post 0"]
+        assert resp.json()["missing"] == [4]
+
+        resp = self.client.get("/users?usernames=bob,alice")
+        assert resp.status_code == 200
+        assert resp.json()["missing"] == ["alice"]
+
+    def test_follows(self):
+        data = {
+            "username": "alice",
+            "email": "alice@example.com",
+            "password": "dog"
+        }
+        resp = self.client.post("/users", json=data)
+        assert resp.status_code == 201
+
+        resp = self.client.get("/me/following/2", headers=self.headers)
+        assert resp.status_code == 404
+
+        resp = self.client.post("/me/following/2", headers=self.headers)
+        assert resp.status_code == 204
+
+        resp = self.client.get("/me/following/2", headers=self.headers)
+        assert resp.status_code == 204
+
+        resp = self.client.get("/me/following", headers=self.headers)
+        assert resp.status_code == 200
+        assert [user["username"] for user in resp.json()["users"]] == ["alice"]
+
+        resp = self.client.get("/users/2/followers")
+        assert resp.status_code == 200
+        assert [user["username"] for user in resp.json()["users"]] == ["bob"]
+
+        resp = self.client.get("/users/alice")
+        assert resp.status_code == 200
+        assert resp.json()["username"] == "alice"
+
+    def test_feed(self):
+        data = {"username": "alice", "email": "alice@example.com", "password": "dog"}
+        assert self.client.post("/users", json=data).status_code == 201
+        resp = self.client.post("/tokens", data={"username": "alice", "password": "dog"})
+        alice = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        assert self.client.post("/me/following/2", headers=self.headers).status_code == 204
+
+        # Post 0 is delivered on write, all posts are merged at read time, delivered ones are listed once.
+        for i in range(3):
+            with mock.patch.object(settings, "feed_fanout_limit", 1 if i == 0 else 0):
+                data = {"title": f"Post {i}", "content": "Create restapi with FastAPI"}
+                assert self.client.post("/posts", headers=alice, json=data).status_code == 201
+
+        with mock.patch.object(settings, "feed_fanout_limit", 0):
+            resp = self.client.get("/me/feed?limit=2", headers=self.headers)
+            assert [post["title"] for post in resp.json()["posts"]] == ["Post 2", "Post 1"]
+            resp = self.client.get(f"/me/feed?cursor={resp.json()['pagination']['next_cursor']}",
+                                   headers=self.headers)
+            assert [post["title"] for post in resp.json()["posts"]] == ["Post 0"]
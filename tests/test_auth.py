@@ -103,3 +103,61 @@ class TestAuth(BaseTestCase):
 
         resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token}"})
         assert resp.status_code == 401
+
+    def test_token_cache(self):
+        from api.models import token_cache
+
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        assert resp.status_code == 201
+        access_token = resp.json()["access_token"]
+
+        resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token}"})
+        assert resp.status_code == 200
+        hits = token_cache.hits
+        resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token}"})
+        assert resp.status_code == 200
+        assert token_cache.hits == hits + 1
+
+        resp = self.client.delete("/tokens", json={"access_token": access_token})
+        assert resp.status_code == 204
+        assert token_cache.get(access_token) is None
+
+    def test_signed_access_token(self):
+        from config import settings
+        from .base_test_case import count_queries
+
+        with mock.patch.object(settings, "signed_access_tokens", True), \
+                mock.patch.object(settings, "secret_key", "top-secret"), \
+                mock.patch.object(settings, "refresh_token_in_body", True):
+            resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+            assert resp.status_code == 201
+            data = resp.json()
+            access_token = data["access_token"]
+            assert len(access_token) <= 64
+
+            with count_queries() as statements:
+                resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token}"})
+                assert resp.status_code == 200
+            assert not any("FROM tokens" in statement for statement in statements)
+
+            forged = access_token[:-2] + ("AA" if access_token[-2:] != "AA" else "BB")
+            resp = self.client.get("/me", headers={"Authorization": f"Bearer {forged}"})
+            assert resp.status_code == 401
+
+            resp = self.client.put("/tokens", json={"access_token": access_token},
+                                   headers={"Cookie": f"refresh_token={data['refresh_token']}"})
+            assert resp.status_code == 200
+            access_token2 = resp.json()["access_token"]
+
+            resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token}"})
+            assert resp.status_code == 401
+
+            resp = self.client.delete("/tokens", json={"access_token": access_token2})
+            assert resp.status_code == 204
+            resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token2}"})
+            assert resp.status_code == 401
+
+            with mock.patch("api.models.datetime") as dt:
+                dt.utcnow.return_value = datetime.utcnow() + timedelta(days=1)
+                resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token2}"})
+                assert resp.status_code == 401
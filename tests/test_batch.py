@@ -0,0 +1,51 @@
+from .base_test_case import BaseTestCase, count_queries, set_connection
+from api.models import Post, User
+
+
+class TestBatch(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with set_connection() as db:
+            for i in range(3):
+                user = User(username=f"user{i}", email=f"user{i}@example.com", password="cat")
+                db.add(Post(title=f"Post {i}", content="Create restapi with FastAPI", author=user))
+            db.commit()
+
+    def test_posts_by_ids(self):
+        with count_queries() as statements:
+            resp = self.client.get("/posts?ids=3,10,1,3")
+            assert resp.status_code == 200
+        assert len(statements) == 1
+
+        data = resp.json()
+        assert "pagination" not in data
+        assert [post["title"] for post in data["posts"]] == ["Post 2", "Post 0"]
+        assert data["posts"][0]["author"]["username"] == "user2"
+        assert data["missing"] == [10]
+
+    def test_users_by_ids(self):
+        resp = self.client.get("/users?ids=4,2,7")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [user["username"] for user in data["users"]] == ["user2", "user0"]
+        assert data["missing"] == [7]
+
+    def test_users_by_usernames(self):
+        resp = self.client.get("/users?usernames=user1,nobody,bob")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [user["username"] for user in data["users"]] == ["user1", "bob"]
+        assert data["missing"] == ["nobody"]
+
+    def test_invalid_batch(self):
+        from config import settings
+
+        resp = self.client.get("/posts?ids=1,x")
+        assert resp.status_code == 400
+
+        resp = self.client.get("/users?ids=1&usernames=bob")
+        assert resp.status_code == 400
+
+        ids = ",".join(str(i) for i in range(settings.max_batch_size + 1))
+        resp = self.client.get(f"/posts?ids={ids}")
+        assert resp.status_code == 400
@@ -0,0 +1,62 @@
+from unittest import mock
+import unittest
+
+from api.cache import ExpiringSet, TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_get_set(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_ratio"] == 0.5
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_ttl(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        with mock.patch("api.cache.time") as time:
+            time.monotonic.return_value = 0
+            cache.set("a", 1)
+            cache.set("b", 2, ttl=120)
+            time.monotonic.return_value = 90
+            assert cache.get("a") is None
+            assert cache.get("b") == 2
+            assert cache.stats()["size"] == 1
+
+    def test_pop(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.pop("a")
+        cache.pop("b")
+        assert cache.get("a") is None
+
+
+class TestExpiringSet(unittest.TestCase):
+    def test_expiration(self):
+        keys = ExpiringSet()
+        with mock.patch("api.cache.time") as time:
+            time.time.return_value = 0
+            keys.add("a", 10)
+            keys.add("b", 20)
+            assert "a" in keys
+            assert "c" not in keys
+
+            time.time.return_value = 15
+            assert "a" not in keys
+            assert "b" in keys
+
+            time.time.return_value = 100
+            keys.add("c", 200)
+            assert len(keys) == 1
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, event
+
+from api.database import engine_options, pool_stats, set_sqlite_pragmas, TimedQueuePool
+
+
+class TestDatabase(unittest.TestCase):
+    def test_engine_options(self):
+        from config import settings
+
+        assert engine_options("sqlite://", TimedQueuePool) == {}
+        assert engine_options("sqlite:///:memory:", TimedQueuePool) == {}
+        options = engine_options("postgresql://user@localhost/blog", TimedQueuePool)
+        assert options["poolclass"] is TimedQueuePool
+        assert options["pool_size"] == settings.database_pool_size
+        assert options["pool_pre_ping"] == settings.database_pool_pre_ping
+
+    def test_sqlite_pragmas_and_pool_stats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{os.path.join(directory, 'test.sqlite')}"
+            engine = create_engine(url, connect_args={"check_same_thread": False},
+                                   **engine_options(url, TimedQueuePool))
+            event.listen(engine, "connect", set_sqlite_pragmas)
+            with engine.connect() as connection:
+                assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+                assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+                assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+                assert engine.pool.stats()["checked_out"] == 1
+            stats = engine.pool.stats()
+            assert stats["checkouts"] == 1
+            assert stats["checked_out"] == 0
+            assert stats["wait_max_ms"] >= stats["wait_avg_ms"] > 0
+            engine.dispose()
+
+    def test_pool_stats(self):
+        assert "sync" in pool_stats()
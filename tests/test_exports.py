@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+import json
+
+from .base_test_case import BaseTestCase, set_connection
+from api.models import Post, User
+
+
+class TestExports(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with set_connection() as db:
+            user = db.query(User).first()
+            for i in range(5):
+                db.add(Post(title=f"Post {i}", content="Create restapi with FastAPI", author=user,
+                            created_at=datetime(2022, 1, 1) + timedelta(days=i)))
+            db.commit()
+
+    def test_export_posts(self):
+        from config import settings
+
+        settings.export_batch_size, batch_size = 2, settings.export_batch_size
+        try:
+            resp = self.client.get("/export/posts")
+        finally:
+            settings.export_batch_size = batch_size
+        assert resp.status_code == 200
+        assert resp.headers["Content-Type"] == "application/x-ndjson"
+        posts = [json.loads(line) for line in resp.text.splitlines()]
+        assert [post["title"] for post in posts] == [f"Post {i}" for i in range(5)]
+        assert posts[0]["author_id"] == 1
+        assert posts[0]["created_at"] == "2022-01-01T00:00:00"
+
+        resp = self.client.get("/export/posts?since=2022-01-04T00:00:00")
+        assert [json.loads(line)["title"] for line in resp.text.splitlines()] == ["Post 3", "Post 4"]
+
+    def test_export_users(self):
+        resp = self.client.get("/export/users")
+        assert resp.status_code == 200
+        users = [json.loads(line) for line in resp.text.splitlines()]
+        assert [user["username"] for user in users] == ["bob"]
+        assert "password_hash" not in users[0]
+        assert "email" not in users[0]
+        # Datetimes are rendered like in other responses.
+        assert users[0]["last_seen"] == self.client.get("/users/bob").json()["last_seen"]
+
+        resp = self.client.get(f"/export/users?since={(datetime.utcnow() + timedelta(days=1)).isoformat()}")
+        assert resp.text == ""
@@ -0,0 +1,147 @@
+from unittest import mock
+
+from .base_test_case import set_connection, BaseTestCase, TestingSessionLocal
+from api.models import Timeline
+from config import settings
+
+
+class TestFeed(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        data = {
+            "username": "alice",
+            "email": "alice@example.com",
+            "password": "dog"
+        }
+        resp = self.client.post("/users", json=data)
+        assert resp.status_code == 201
+
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        self.bob = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        resp = self.client.post("/tokens", data={"username": "alice", "password": "dog"})
+        self.alice = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    def create_post(self, title, headers=None):
+        data = {
+            "title": title,
+            "content": "Create restapi with FastAPI"
+        }
+        resp = self.client.post("/posts", headers=headers or self.alice, json=data)
+        assert resp.status_code == 201
+
+    def create_charlie(self):
+        data = {
+            "username": "charlie",
+            "email": "charlie@example.com",
+            "password": "owl"
+        }
+        resp = self.client.post("/users", json=data)
+        assert resp.status_code == 201
+        resp = self.client.post("/tokens", data={"username": "charlie", "password": "owl"})
+        return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    def feed_titles(self):
+        resp = self.client.get("/me/feed", headers=self.bob)
+        assert resp.status_code == 200
+        return [post["title"] for post in resp.json()["posts"]]
+
+    def feed_pages(self, limit):
+        titles, cursor = [], None
+        while True:
+            url = f"/me/feed?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+            resp = self.client.get(url, headers=self.bob)
+            assert resp.status_code == 200
+            titles.append([post["title"] for post in resp.json()["posts"]])
+            cursor = resp.json()["pagination"]["next_cursor"]
+            if cursor is None:
+                return titles
+
+    def timeline_size(self):
+        size = None
+        with set_connection() as db:
+            size = db.query(Timeline).count()
+        return size
+
+    def test_no_auth(self):
+        resp = self.client.get("/me/feed")
+        assert resp.status_code == 401
+
+    def test_fan_out_on_write(self):
+        resp = self.client.post("/me/following/2", headers=self.bob)
+        assert resp.status_code == 204
+
+        self.create_post("Post 1")
+        self.create_post("Post 2")
+        assert self.timeline_size() == 2
+        assert self.feed_titles() == ["Post 2", "Post 1"]
+
+        resp = self.client.delete("/posts/2", headers=self.alice)
+        assert resp.status_code == 204
+        assert self.timeline_size() == 1
+        assert self.feed_titles() == ["Post 1"]
+
+    def test_fan_out_on_read(self):
+        resp = self.client.post("/me/following/2", headers=self.bob)
+        assert resp.status_code == 204
+
+        fanout_limit = settings.feed_fanout_limit
+        settings.feed_fanout_limit = 0
+        try:
+            self.create_post("Post 1")
+            assert self.timeline_size() == 0
+            assert self.feed_titles() == ["Post 1"]
+        finally:
+            settings.feed_fanout_limit = fanout_limit
+
+    def test_backfill_and_trim(self):
+        self.create_post("Post 1")
+        assert self.feed_titles() == []
+
+        resp = self.client.post("/me/following/2", headers=self.bob)
+        assert resp.status_code == 204
+        assert self.feed_titles() == ["Post 1"]
+
+        resp = self.client.delete("/me/following/2", headers=self.bob)
+        assert resp.status_code == 204
+        assert self.timeline_size() == 0
+        assert self.feed_titles() == []
+
+    def test_merge_pages(self):
+        charlie = self.create_charlie()
+        with mock.patch.object(settings, "feed_fanout_limit", 1):
+            # Alice posts are delivered on write, Charlie's are merged at read time.
+            assert self.client.post("/me/following/2", headers=self.bob).status_code == 204
+            assert self.client.post("/me/following/3", headers=self.bob).status_code == 204
+            assert self.client.post("/me/following/3", headers=self.alice).status_code == 204
+            for i in range(1, 8):
+                self.create_post(f"Post {i}", self.alice if i % 2 else charlie)
+            assert self.timeline_size() == 4
+            assert self.feed_pages(2) == [["Post 7", "Post 6"], ["Post 5", "Post 4"], ["Post 3", "Post 2"],
+                                          ["Post 1"]]
+            resp = self.client.get("/me/feed?limit=2&offset=3", headers=self.bob)
+            assert [post["title"] for post in resp.json()["posts"]] == ["Post 4", "Post 3"]
+
+    def test_author_drops_below_fanout_limit(self):
+        charlie = self.create_charlie()
+        with mock.patch.object(settings, "feed_fanout_limit", 1):
+            assert self.client.post("/me/following/2", headers=self.bob).status_code == 204
+            assert self.client.post("/me/following/2", headers=charlie).status_code == 204
+            self.create_post("Post 1")
+            assert self.timeline_size() == 0
+            assert self.feed_titles() == ["Post 1"]
+
+            # Alice is delivered on write again, her earlier post is delivered too.
+            assert self.client.delete("/me/following/2", headers=charlie).status_code == 204
+            assert self.timeline_size() == 1
+            self.create_post("Post 2")
+            assert self.timeline_size() == 2
+            assert self.feed_titles() == ["Post 2", "Post 1"]
+
+    def test_truncate(self):
+        assert self.client.post("/me/following/2", headers=self.bob).status_code == 204
+        for i in range(1, 5):
+            self.create_post(f"Post {i}")
+        with mock.patch.object(settings, "feed_timeline_size", 2), TestingSessionLocal() as db:
+            assert Timeline.truncate(db) == 2
+            assert Timeline.truncate(db) == 0
+        assert self.feed_titles() == ["Post 4", "Post 3"]
@@ -0,0 +1,79 @@
+from .base_test_case import count_queries, set_connection, BaseTestCase
+from api.models import User
+
+
+class TestFollows(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        assert resp.status_code == 201
+        self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    def test_follow_unfollow(self):
+        data = {
+            "username": "alice",
+            "email": "alice@example.com",
+            "password": "dog"
+        }
+        resp = self.client.post("/users", json=data)
+        assert resp.status_code == 201
+
+        resp = self.client.post("/me/following/2", headers=self.headers)
+        assert resp.status_code == 204
+        resp = self.client.post("/me/following/2", headers=self.headers)
+        assert resp.status_code == 409
+        resp = self.client.get("/me/following/2", headers=self.headers)
+        assert resp.status_code == 204
+
+        resp = self.client.delete("/me/following/2", headers=self.headers)
+        assert resp.status_code == 204
+        resp = self.client.delete("/me/following/2", headers=self.headers)
+        assert resp.status_code == 409
+        resp = self.client.get("/me/following/2", headers=self.headers)
+        assert resp.status_code == 404
+
+        resp = self.client.post("/me/following/3", headers=self.headers)
+        assert resp.status_code == 404
+
+    def test_check_does_not_depend_on_followers(self):
+        with set_connection() as db:
+            celebrity = User(username="alice", email="alice@example.com", password="dog")
+            db.add(celebrity)
+            db.commit()
+            for i in range(50):
+                fan = User(username=f"fan{i}", email=f"fan{i}@example.com", password="cat")
+                db.add(fan)
+                db.flush()
+                fan.follow(celebrity)
+            db.commit()
+
+        with count_queries() as statements:
+            resp = self.client.get("/me/following/2", headers=self.headers)
+            assert resp.status_code == 404
+        follow_checks = [statement for statement in statements if "FROM followers" in statement]
+        assert len(follow_checks) == 1
+        assert "EXISTS" in follow_checks[0]
+
+    def test_counters(self):
+        data = {
+            "username": "alice",
+            "email": "alice@example.com",
+            "password": "dog"
+        }
+        resp = self.client.post("/users", json=data)
+        assert resp.status_code == 201
+        assert resp.json()["followers_count"] == 0
+
+        resp = self.client.post("/me/following/2", headers=self.headers)
+        assert resp.status_code == 204
+        assert self.client.get("/users/alice").json()["followers_count"] == 1
+        assert self.client.get("/users/bob").json()["following_count"] == 1
+
+        resp = self.client.post("/me/following/2", headers=self.headers)
+        assert resp.status_code == 409
+        assert self.client.get("/users/alice").json()["followers_count"] == 1
+
+        resp = self.client.delete("/me/following/2", headers=self.headers)
+        assert resp.status_code == 204
+        assert self.client.get("/users/alice").json()["followers_count"] == 0
+        assert self.client.get("/users/bob").json()["following_count"] == 0
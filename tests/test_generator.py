@@ -0,0 +1,59 @@
+from collections import Counter
+from datetime import datetime
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base
+from api.generator import DatasetGenerator
+from api.importer import Importer
+from api.models import Post, Timeline, Token, User
+
+END = datetime(2022, 6, 1)
+
+
+class TestGenerator(unittest.TestCase):
+    def test_deterministic(self):
+        first = DatasetGenerator(50, 200, tokens=5, seed=1, end=END)
+        second = DatasetGenerator(50, 200, tokens=5, seed=1, end=END)
+        other = DatasetGenerator(50, 200, tokens=5, seed=2, end=END)
+        assert list(first.post_rows()) == list(second.post_rows())
+        assert list(first.follow_rows()) == list(second.follow_rows())
+        assert list(first.token_rows()) == list(second.token_rows())
+        assert list(first.post_rows()) != list(other.post_rows())
+
+    def test_distributions(self):
+        generator = DatasetGenerator(1000, 5000, follows_per_user=10, end=END)
+        posts = list(generator.post_rows())
+        created = [post["created_at"] for post in posts]
+        assert created == sorted(created)
+        assert generator.start <= created[0] and created[-1] <= END
+        # Site grows, so there are more posts in the second half of the period.
+        middle = generator.start + (END - generator.start) / 2
+        assert sum(date > middle for date in created) > 0.6 * len(created)
+        assert all(1 <= len(post["title"]) <= 50 for post in posts)
+
+        edges = list(generator.follow_rows())
+        assert all(edge["follower_id"] != edge["followed_id"] for edge in edges)
+        assert len(set((edge["follower_id"], edge["followed_id"]) for edge in edges)) == len(edges)
+        followers = sorted(Counter(edge["followed_id"] for edge in edges).values(), reverse=True)
+        assert followers[0] > 20 * followers[len(followers) // 2]
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'generated.sqlite')}")
+            Base.metadata.create_all(bind=engine)
+            generator = DatasetGenerator(20, 100, follows_per_user=5, tokens=3, end=END)
+            with sessionmaker(bind=engine)() as db, Importer(db, batch_size=30) as importer:
+                counts = generator.load(importer)
+                assert counts["users"] == 20
+                assert counts["posts"] == 100
+                assert db.scalar(select(func.count()).select_from(Token)) == 3
+                assert db.scalar(select(func.sum(User.posts_count))) == 100
+                assert db.scalar(select(func.sum(User.followers_count))) == counts["follows"]
+                assert db.scalar(select(func.count()).select_from(Timeline)) > 0
+                assert db.get(Post, 100).created_at <= END
+            engine.dispose()
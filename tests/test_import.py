@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+
+from .base_test_case import BaseTestCase, TestingSessionLocal
+from api.importer import Importer, read_records
+from api.models import User
+
+
+class TestImport(BaseTestCase):
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        super().tearDown()
+
+    def test_read_records(self):
+        path = self.write("users.csv", "username,email\nalice,alice@example.com\n")
+        assert list(read_records(path)) == [{"username": "alice", "email": "alice@example.com"}]
+
+        path = self.write("users.ndjson", '{"username": "alice"}\n\n{"username": "charlie"}\n')
+        assert [record["username"] for record in read_records(path)] == ["alice", "charlie"]
+
+    def test_import(self):
+        users = self.write("users.ndjson", "\n".join(json.dumps(user) for user in [
+            {"user_id": 10, "username": "alice", "email": "alice@example.com", "password": "dog"},
+            {"user_id": 11, "username": "charlie", "email": "charlie@example.com", "password": "fish"},
+        ]))
+        posts = self.write("posts.csv", "post_id,title,content,author_id,created_at\n"
+                                        "1,Hello,First post,10,2022-01-01T10:00:00\n"
+                                        "2,Again,Second post,10,\n")
+        follows = self.write("follows.csv", "follower_id,followed_id\n1,10\n11,10\n")
+
+        progress = []
+        with TestingSessionLocal() as db, \
+                Importer(db, batch_size=1, progress=lambda *args: progress.append(args[:2])) as importer:
+            assert importer.import_users(read_records(users)) == 2
+            assert importer.import_posts(read_records(posts)) == 2
+            assert importer.import_follows(read_records(follows)) == 2
+            importer.finish()
+
+            alice = db.get(User, 10)
+            assert alice.posts_count == 2
+            assert alice.followers_count == 2
+        assert progress[:2] == [("users", 1), ("users", 2)]
+
+        resp = self.client.post("/tokens", data={"username": "charlie", "password": "fish"})
+        assert resp.status_code == 201
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        resp = self.client.get("/me/feed", headers=headers)
+        assert [post["title"] for post in resp.json()["posts"]] == ["Again", "Hello"]
+
+        resp = self.client.get("/posts/search?q=second")
+        assert [post["title"] for post in resp.json()["posts"]] == ["Again"]
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import exc
+
+from .base_test_case import TestingSessionLocal, BaseTestCase
+from api.models import User, last_seen_buffer
+from api.tasks import PeriodicTask
+
+
+class TestLastSeen(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with TestingSessionLocal() as db:
+            last_seen_buffer.flush(db)
+
+    def test_ping_is_buffered(self):
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.username == "bob").first()
+            user.last_seen = datetime.utcnow() - timedelta(days=1)
+            db.commit()
+
+            user.ping()
+            assert user.last_seen > datetime.utcnow() - timedelta(minutes=1)
+            assert not db.dirty
+            assert len(last_seen_buffer) == 1
+
+            # Coalesced within granularity
+            user.ping()
+            assert len(last_seen_buffer) == 1
+
+            assert last_seen_buffer.flush(db) == 1
+            assert len(last_seen_buffer) == 0
+
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.username == "bob").first()
+            assert user.last_seen > datetime.utcnow() - timedelta(minutes=1)
+
+    def test_failed_flush_keeps_values(self):
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.username == "bob").first()
+            old = datetime.utcnow() - timedelta(days=2)
+            older = datetime.utcnow() - timedelta(days=3)
+            last_seen_buffer.record(user.user_id, old)
+            last_seen_buffer.record(user.user_id + 1, older)
+
+            def execute(*args, **kwargs):
+                # Newer value recorded while failing write is in flight.
+                last_seen_buffer.record(user.user_id + 1, old)
+                raise exc.OperationalError("UPDATE", {}, Exception("database is locked"))
+
+            with mock.patch.object(db, "execute", side_effect=execute):
+                with self.assertRaises(exc.OperationalError):
+                    last_seen_buffer.flush(db)
+            assert last_seen_buffer._pending == {user.user_id: old, user.user_id + 1: old}
+
+            assert last_seen_buffer.flush(db) == 2
+            db.refresh(user)
+            assert user.last_seen == old
+
+    def test_authenticated_read_does_not_write(self):
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        assert resp.status_code == 201
+        access_token = resp.json()["access_token"]
+
+        with TestingSessionLocal() as db:
+            db.query(User).update({"last_seen": datetime.utcnow() - timedelta(days=1)})
+            db.commit()
+
+        resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token}"})
+        assert resp.status_code == 200
+        assert len(last_seen_buffer) == 1
+
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.username == "bob").first()
+            assert user.last_seen < datetime.utcnow() - timedelta(hours=1)
+
+    def test_periodic_task_runs_on_stop(self):
+        calls = []
+
+        def task_function():
+            calls.append(1)
+            return len(calls)
+
+        task = PeriodicTask(3600, task_function)
+        task.start()
+        task.stop()
+        assert calls == [1]
+        assert task.last_result == 1
+        assert task.last_duration is not None
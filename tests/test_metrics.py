@@ -0,0 +1,61 @@
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from .base_test_case import BaseTestCase
+from api import create_app
+from api.metrics import metrics, render
+from api.models import token_cache
+from config import settings
+
+
+class TestMetrics(BaseTestCase):
+    def setUp(self):
+        patch = mock.patch.object(settings, "use_metrics", True)
+        patch.start()
+        self.addCleanup(patch.stop)
+        super().setUp()
+        metrics.clear()
+        token_cache.clear()
+
+    def test_request_metrics(self):
+        assert self.client.get("/users/bob").status_code == 200
+        assert self.client.get("/users/alice").status_code == 404
+        response = self.client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'http_responses_total{method="GET",route="/users/{username}",status="200"} 1' in body
+        assert 'http_responses_total{method="GET",route="/users/{username}",status="404"} 1' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/users/{username}"} 2' in body
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/users/{username}",le="+Inf"} 2' in body
+        assert "http_requests_in_progress 1" in body
+
+    def test_sql_statements_per_request(self):
+        self.client.get("/users/bob")
+        counts = metrics.statements.counts[("GET", "/users/{username}")]
+        assert sum(counts) == 1
+        assert counts[0] == 0
+        assert metrics.statements.sums[("GET", "/users/{username}")] >= 1
+
+    def test_unmatched_route(self):
+        self.client.get("/nowhere")
+        assert metrics.responses[("GET", "unmatched", "404")] == 1
+
+    def test_pool_and_cache_metrics(self):
+        token_cache.get("missing")
+        body = render()
+        assert 'db_pool_checked_out{pool="sync"}' in body
+        assert 'db_pool_overflow{pool="sync"}' in body
+        assert 'cache_misses_total{cache="token"} 1' in body
+        assert 'cache_hit_ratio{cache="token"} 0.0' in body
+
+    def test_metrics_token(self):
+        with mock.patch.object(settings, "metrics_token", "secret"):
+            assert self.client.get("/metrics").status_code == 401
+            assert self.client.get("/metrics", headers={"Authorization": "Bearer other"}).status_code == 401
+            assert self.client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+    def test_disabled_by_default(self):
+        with mock.patch.object(settings, "use_metrics", False):
+            assert TestClient(create_app()).get("/metrics").status_code == 404
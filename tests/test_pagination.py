@@ -1,7 +1,19 @@
-from .base_test_case import BaseTestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import time
+
+from .base_test_case import BaseTestCase, TestingSessionLocal
+from api import pagination
+from api.models import User
+from api.pagination import table_count, table_counts, use_estimate
+from config import settings
 
 
 class TestPagination(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        table_counts.clear()
+
     def test_retrieve_all_users(self):
         resp = self.client.get("/users?limit=2")
         assert resp.status_code == 200 
@@ -158,3 +170,126 @@ class TestPagination(BaseTestCase):
         assert data["pagination"]["limit"] == 2
         assert data["pagination"]["offset"] == 0
         assert len(data["users"]) == 1
+
+    def test_posts_cursor(self):
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        assert resp.status_code == 201
+        access_token = resp.json()["access_token"]
+
+        for i in range(5):
+            data = {
+                "title": f"Post {i}",
+                "content": "Create restapi with FastAPI"
+            }
+            resp = self.client.post("/posts", headers={"Authorization": f"Bearer {access_token}"}, json=data)
+            assert resp.status_code == 201
+
+        resp = self.client.get("/posts?limit=2")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [post["title"] for post in data["posts"]] == ["Post 4", "Post 3"]
+        assert data["pagination"]["next_cursor"] is not None
+
+        resp = self.client.get(f"/posts?limit=2&cursor={data['pagination']['next_cursor']}")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [post["title"] for post in data["posts"]] == ["Post 2", "Post 1"]
+        assert data["pagination"]["next_cursor"] is not None
+
+        resp = self.client.get(f"/users/1/posts?limit=2&cursor={data['pagination']['next_cursor']}")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [post["title"] for post in data["posts"]] == ["Post 0"]
+        assert data["pagination"]["next_cursor"] is None
+
+    def test_users_cursor(self):
+        for username in ["alice", "charlie"]:
+            data = {
+                "username": username,
+                "email": f"{username}@example.com",
+                "password": "dog"
+            }
+            resp = self.client.post("/users", json=data)
+            assert resp.status_code == 201
+
+        resp = self.client.get("/users?limit=2")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [user["username"] for user in data["users"]] == ["bob", "alice"]
+
+        resp = self.client.get(f"/users?limit=2&cursor={data['pagination']['next_cursor']}")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [user["username"] for user in data["users"]] == ["charlie"]
+        assert data["pagination"]["next_cursor"] is None
+
+    def test_invalid_cursor(self):
+        resp = self.client.get("/users?cursor=notacursor")
+        assert resp.status_code == 400
+
+        resp = self.client.get("/posts?cursor=WyJ4Il0=")
+        assert resp.status_code == 400
+
+    def test_max_limit(self):
+        from config import settings
+
+        resp = self.client.get("/users?limit=100000")
+        assert resp.status_code == 200
+        assert resp.json()["pagination"]["limit"] == settings.max_page_limit
+
+    def test_totals(self):
+        resp = self.client.post("/users", json={"username": "alice", "email": "alice@example.com", "password": "dog"})
+        assert resp.status_code == 201
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        for i in range(3):
+            resp = self.client.post("/posts", headers=headers, json={"title": f"Post {i}", "content": "Content"})
+            assert resp.status_code == 201
+        assert self.client.post("/me/following/2", headers=headers).status_code == 204
+
+        assert self.client.get("/users?limit=1").json()["pagination"]["total"] == 2
+        assert self.client.get("/posts?limit=1").json()["pagination"]["total"] == 3
+        assert self.client.get("/users/1/posts?limit=1").json()["pagination"]["total"] == 3
+        assert self.client.get("/users/2/posts").json()["pagination"]["total"] == 0
+        assert self.client.get("/me/following", headers=headers).json()["pagination"]["total"] == 1
+        assert self.client.get("/me/followers", headers=headers).json()["pagination"]["total"] == 0
+        assert self.client.get("/users/2/followers").json()["pagination"]["total"] == 1
+        assert self.client.get("/users/1/following").json()["pagination"]["total"] == 1
+        assert self.client.get("/me/feed", headers=headers).json()["pagination"]["total"] is None
+
+        # Table counts are cached, counters of a user are always exact.
+        resp = self.client.post("/posts", headers=headers, json={"title": "Another", "content": "Content"})
+        assert self.client.get("/posts").json()["pagination"]["total"] == 3
+        assert self.client.get("/users/1/posts").json()["pagination"]["total"] == 4
+        table_counts.clear()
+        assert self.client.get("/posts").json()["pagination"]["total"] == 4
+
+    def test_concurrent_counts_run_once(self):
+        calls = []
+        count_statement = pagination.count_statement
+
+        def slow_count_statement(table):
+            calls.append(table.name)
+            time.sleep(0.2)
+            return count_statement(table)
+
+        def count(_):
+            with TestingSessionLocal() as db:
+                return table_count(db, User)
+
+        with mock.patch.object(pagination, "count_statement", slow_count_statement), \
+                ThreadPoolExecutor(8) as executor:
+            assert list(executor.map(count, range(8))) == [1] * 8
+            assert calls == ["users"]
+
+            # Expired count is served to others while one request counts again.
+            table_counts.clear()
+            assert list(executor.map(count, range(8))) == [1] * 8
+            assert calls == ["users"] * 2
+
+    def test_use_estimate(self):
+        with mock.patch.object(settings, "exact_count_threshold", 1000):
+            assert not use_estimate(None)
+            assert not use_estimate(-1)
+            assert not use_estimate(999)
+            assert use_estimate(1000)
@@ -1,4 +1,6 @@
-from .base_test_case import BaseTestCase
+from .base_test_case import count_queries, set_connection, BaseTestCase
+from api.models import Post, User
+from api.pagination import table_counts
 
 
 class TestPosts(BaseTestCase):
@@ -81,9 +83,65 @@ class TestPosts(BaseTestCase):
         resp = self.client.post("/posts", headers={"Authorization": f"Bearer {access_token}"}, json=data)
         assert resp.status_code == 201
 
+        assert resp.json()["author"]["posts_count"] == 1
+
         resp = self.client.delete("/posts/1", headers={"Authorization": f"Bearer {access_token}"})
         assert resp.status_code == 204
 
         resp = self.client.get("/posts/1")
         assert resp.status_code == 404
-        
\ No newline at end of file
+        assert self.client.get("/users/bob").json()["posts_count"] == 0
+        
+    def test_post_list_query_count(self):
+        with set_connection() as db:
+            for i in range(10):
+                user = User(username=f"user{i}", email=f"user{i}@example.com", password="cat")
+                db.add(Post(title=f"Post {i}", content="Create restapi with FastAPI", author=user))
+            db.commit()
+
+        # Total number of posts is counted once and cached.
+        table_counts.clear()
+        assert self.client.get("/posts").json()["pagination"]["total"] == 10
+        queries = []
+        for limit in [2, 10]:
+            with count_queries() as statements:
+                resp = self.client.get(f"/posts?limit={limit}")
+                assert resp.status_code == 200
+                assert len(resp.json()["posts"]) == limit
+            queries.append(len(statements))
+        assert queries[0] == queries[1] == 1
+
+        with count_queries() as statements:
+            resp = self.client.get("/posts/1")
+            assert resp.status_code == 200
+            assert resp.json()["author"]["username"] == "user0"
+        assert len(statements) == 1
+
+    def test_conditional_get(self):
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        access_token = resp.json()["access_token"]
+        data = {
+            "title": "FastAPI Tutorial",
+            "content": "Create restapi with FastAPI"
+        }
+        resp = self.client.post("/posts", headers={"Authorization": f"Bearer {access_token}"}, json=data)
+        assert resp.status_code == 201
+
+        resp = self.client.get("/posts/1")
+        etag = resp.headers["ETag"]
+        resp = self.client.get("/posts/1", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+
+        # Embedded author is part of post representation.
+        resp = self.client.put("/me", headers={"Authorization": f"Bearer {access_token}"}, json={"about_me": "Hi"})
+        assert resp.status_code == 200
+        resp = self.client.get("/posts/1", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.json()["author"]["about_me"] == "Hi"
+        etag = resp.headers["ETag"]
+
+        resp = self.client.put("/posts/1", headers={"Authorization": f"Bearer {access_token}"}, json={"title": "New title"})
+        assert resp.status_code == 200
+        resp = self.client.get("/posts/1", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.json()["title"] == "New title"
@@ -0,0 +1,64 @@
+import json
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from .base_test_case import BaseTestCase, override_get_db, TestingSessionLocal
+from api import create_app
+from api.database import get_db
+from api.models import User
+from api.profiling import RequestProfile, statement_shape
+from config import settings
+
+
+class TestProfiling(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with mock.patch.object(settings, "sql_profiling", True):
+            app = create_app()
+        app.dependency_overrides[get_db] = override_get_db
+
+        @app.get("/n-plus-one")
+        def n_plus_one():
+            with TestingSessionLocal() as db:
+                for username in ("bob", "alice", "carol", "dave", "eve"):
+                    db.query(User).filter_by(username=username).first()
+            return {}
+
+        self.client = TestClient(app)
+
+    def test_server_timing_header(self):
+        with self.assertLogs("api.profiling", "INFO") as logs:
+            response = self.client.get("/users/bob")
+        assert response.status_code == 200
+        assert response.headers["server-timing"].startswith("db;dur=")
+        assert "db-repeated" not in response.headers["server-timing"]
+        record = json.loads(logs.records[0].getMessage())
+        assert record["path"] == "/users/bob"
+        assert record["status"] == 200
+        assert record["sql_statements"] >= 1
+        assert record["sql_repeated"] == []
+
+    def test_repeated_statements(self):
+        with self.assertLogs("api.profiling", "WARNING") as logs:
+            response = self.client.get("/n-plus-one")
+        assert 'db-repeated;desc="1 shapes, 5 statements"' in response.headers["server-timing"]
+        record = json.loads(logs.records[0].getMessage())
+        assert record["sql_statements"] == 5
+        assert record["sql_repeated"][0]["count"] == 5
+        assert "FROM users" in record["sql_repeated"][0]["statement"]
+
+    def test_statement_shape(self):
+        assert statement_shape("SELECT *\n  FROM users WHERE user_id IN (?, ?, ?)") == \
+            statement_shape("SELECT * FROM users WHERE user_id IN (?, ?)")
+        assert statement_shape("SELECT * FROM users WHERE user_id IN (%(id_1)s, %(id_2)s)") == \
+            "SELECT * FROM users WHERE user_id IN (?)"
+
+    def test_request_profile(self):
+        profile = RequestProfile()
+        profile.record("SELECT 1", 0.002)
+        profile.record("SELECT  1", 0.001)
+        profile.record("SELECT 2", 0.001)
+        assert profile.count == 3
+        assert profile.repeated(2) == [("SELECT 1", 2)]
+        assert profile.repeated(3) == []
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from .base_test_case import BaseTestCase, engine, override_get_db
+from api import create_app
+from api.database import get_db
+from api.models import token_cache
+from api.clients import client_key
+from api.ratelimit import DatabaseStore, Limit, MemoryStore, route_group
+from config import settings
+
+
+class TestRateLimit(BaseTestCase):
+    def client_with(self, limits: dict) -> TestClient:
+        with mock.patch.object(settings, "rate_limiting", True), mock.patch.object(settings, "rate_limits", limits):
+            app = create_app()
+        app.dependency_overrides[get_db] = override_get_db
+        return TestClient(app)
+
+    def test_limit(self):
+        limit = Limit.parse("10/60")
+        assert limit.burst == 10
+        assert limit.refill_time == 60
+
+    def test_route_group(self):
+        assert route_group("POST", "/tokens") == "login"
+        assert route_group("PUT", "/tokens") == "login"
+        assert route_group("DELETE", "/tokens") == "write"
+        assert route_group("POST", "/posts") == "write"
+        assert route_group("GET", "/posts") == "read"
+        assert route_group("OPTIONS", "/posts") is None
+
+    def test_memory_store(self):
+        store = MemoryStore(maxsize=2)
+        limit = Limit(2, 1.0)
+        assert store.take("a", limit, now=0) == 0
+        assert store.take("a", limit, now=0) == 0
+        assert store.take("a", limit, now=0) == 1.0
+        assert store.take("a", limit, now=0.5) == 0.5
+        assert store.take("a", limit, now=1.5) == 0
+
+        store.take("b", limit, now=1.5)
+        store.take("c", limit, now=1.5)
+        assert len(store) == 2
+        # Buckets that filled up again are dropped.
+        store.take("d", limit, now=10)
+        assert len(store) == 1
+
+    def test_database_store(self):
+        store = DatabaseStore()
+        store.engine = engine
+        limit = Limit(2, 1.0)
+        assert store.take("a", limit, now=100) == 0
+        assert store.take("a", limit, now=100) == 0
+        assert store.take("a", limit, now=100) == 1.0
+        assert store.take("a", limit, now=100.5) == 0.5
+        assert store.take("a", limit, now=101.5) == 0
+        assert store.take("b", limit, now=101.5) == 0
+
+    def test_login_limited(self):
+        client = self.client_with({"login": "2/60"})
+        for _ in range(2):
+            resp = client.post("/tokens", data={"username": "bob", "password": "wrong"})
+            assert resp.status_code == 401
+        resp = client.post("/tokens", data={"username": "bob", "password": "cat"})
+        assert resp.status_code == 429
+        assert 0 < int(resp.headers["Retry-After"]) <= 30
+        assert resp.json() == {"detail": "Too many requests, try again later"}
+        assert client.get("/users/bob").status_code == 200
+
+    def test_keyed_by_user(self):
+        client = self.client_with({"read": "3/60"})
+        token_cache.clear()
+        resp = client.post("/tokens", data={"username": "bob", "password": "cat"})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        scope = {"headers": [(b"authorization", headers["Authorization"].encode())], "client": ("1.2.3.4", 1)}
+        assert client_key(scope) == "ip:1.2.3.4"
+        # Unknown token counts against address, verified one against user.
+        assert client.get("/me", headers=headers).status_code == 200
+        assert client_key(scope) == "user:1"
+        assert client.get("/me", headers=headers).status_code == 200
+        assert client.get("/me", headers=headers).status_code == 200
+        assert client.get("/me", headers=headers).status_code == 200
+        assert client.get("/me", headers=headers).status_code == 429
+        assert client.get("/users/bob").status_code == 200
@@ -0,0 +1,80 @@
+import os
+import tempfile
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from .base_test_case import BaseTestCase, override_get_db
+from api import create_app
+from api.database import Base, get_db, make_engine, recent_writers, ReplicaSet
+from api.models import User
+
+
+class TestReplicas(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.replica = make_engine(f"sqlite:///{os.path.join(self.directory.name, 'replica.sqlite')}")
+        Base.metadata.create_all(bind=self.replica)
+        with self.replica.begin() as connection:
+            connection.execute(User.__table__.insert(), {"username": "ghost", "email": "ghost@example.com",
+                                                         "password_hash": "x"})
+        recent_writers.clear()
+
+    def tearDown(self):
+        self.replica.dispose()
+        self.directory.cleanup()
+        super().tearDown()
+
+    def client_with(self, replicas: ReplicaSet) -> TestClient:
+        patch = mock.patch("api.database.replicas", replicas)
+        patch.start()
+        self.addCleanup(patch.stop)
+        app = create_app()
+        app.dependency_overrides[get_db] = override_get_db
+        return TestClient(app)
+
+    def test_reads_go_to_replica(self):
+        client = self.client_with(ReplicaSet([self.replica], 30))
+        assert client.get("/users/ghost").status_code == 200
+        assert client.get("/users/bob").status_code == 404
+        assert client.get("/users").json()["users"][0]["username"] == "ghost"
+
+    def test_read_your_writes(self):
+        client = self.client_with(ReplicaSet([self.replica], 30))
+        resp = client.post("/tokens", data={"username": "bob", "password": "cat"})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        recent_writers.clear()
+        assert client.get("/users/bob", headers=headers).status_code == 404
+
+        resp = client.put("/me", headers=headers, json={"about_me": "Hello"})
+        assert resp.status_code == 200
+        resp = client.get("/users/bob", headers=headers)
+        assert resp.status_code == 200
+        assert resp.json()["about_me"] == "Hello"
+
+        recent_writers.clear()
+        assert client.get("/users/bob", headers=headers).status_code == 404
+
+    def test_register_then_read(self):
+        client = self.client_with(ReplicaSet([self.replica], 30))
+        resp = client.post("/users", json={"username": "alice", "email": "alice@example.com", "password": "dog"})
+        assert resp.status_code == 201
+        assert client.get("/users/alice").status_code == 200
+
+        resp = client.post("/tokens", data={"username": "alice", "password": "dog"})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        resp = client.get("/users/alice", headers=headers)
+        assert resp.status_code == 200
+
+        recent_writers.clear()
+        assert client.get("/users/alice", headers=headers).status_code == 404
+
+    def test_fallback_to_primary(self):
+        broken = make_engine(f"sqlite:///{os.path.join(self.directory.name, 'missing', 'replica.sqlite')}")
+        client = self.client_with(ReplicaSet([broken, self.replica], 30))
+        for _ in range(3):
+            assert client.get("/users/ghost").status_code == 200
+
+        client = self.client_with(ReplicaSet([broken], 30))
+        assert client.get("/users/bob").status_code == 200
@@ -0,0 +1,54 @@
+from .base_test_case import BaseTestCase
+
+
+class TestSearch(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        for title, content in [("FastAPI Tutorial", "Create restapi with FastAPI"),
+                               ("Cooking", "Pancakes with maple syrup"),
+                               ("Databases", "Indexing posts for FastAPI search, FastAPI everywhere")]:
+            resp = self.client.post("/posts", headers=self.headers, json={"title": title, "content": content})
+            assert resp.status_code == 201
+
+    def test_search(self):
+        resp = self.client.get("/posts/search?q=fastapi")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert {post["title"] for post in data["posts"]} == {"FastAPI Tutorial", "Databases"}
+        assert data["posts"][0]["author"]["username"] == "bob"
+
+        resp = self.client.get("/posts/search?q=fastapi search")
+        assert [post["title"] for post in resp.json()["posts"]] == ["Databases"]
+
+        resp = self.client.get("/posts/search?q=fastapi&limit=1&offset=1")
+        assert len(resp.json()["posts"]) == 1
+        assert resp.json()["pagination"]["offset"] == 1
+
+    def test_search_pages(self):
+        titles = []
+        for offset in range(3):
+            resp = self.client.get(f"/posts/search?q=fastapi&limit=1&offset={offset}")
+            assert resp.status_code == 200
+            assert resp.json()["pagination"]["next_cursor"] is None
+            titles += [post["title"] for post in resp.json()["posts"]]
+        assert sorted(titles) == ["Databases", "FastAPI Tutorial"]
+
+    def test_search_syntax_is_ignored(self):
+        resp = self.client.get('/posts/search?q="pancakes" -(*')
+        assert resp.status_code == 200
+        assert [post["title"] for post in resp.json()["posts"]] == ["Cooking"]
+
+        resp = self.client.get("/posts/search?q=-()")
+        assert resp.status_code == 400
+
+    def test_index_follows_changes(self):
+        resp = self.client.put("/posts/2", headers=self.headers, json={"content": "Waffles"})
+        assert resp.status_code == 200
+        assert self.client.get("/posts/search?q=pancakes").json()["posts"] == []
+        assert len(self.client.get("/posts/search?q=waffles").json()["posts"]) == 1
+
+        resp = self.client.delete("/posts/2", headers=self.headers)
+        assert resp.status_code == 204
+        assert self.client.get("/posts/search?q=waffles").json()["posts"] == []
@@ -0,0 +1,60 @@
+from unittest import mock
+import unittest
+
+from .base_test_case import TestingSessionLocal, BaseTestCase
+from api import errors, security
+from api.models import User
+from config import settings
+
+
+class TestHashers(unittest.TestCase):
+    def test_hashers(self):
+        for algorithm, cost in [("md5", 0), ("pbkdf2_sha256", 1000), ("scrypt", 10)]:
+            hasher = security.HASHERS[algorithm](cost)
+            password_hash = hasher.hash("cat")
+            assert len(password_hash) <= 128
+            assert security.get_hasher(password_hash).algorithm == algorithm
+            assert hasher.verify(password_hash, "cat")
+            assert hasher.verify(password_hash, "dog") == False
+
+    def test_algorithm_tag(self):
+        password_hash = security.ScryptHasher(10).hash("cat")
+        assert password_hash.startswith("scrypt$10$")
+        assert security.ScryptHasher(10).needs_rehash(password_hash) == False
+        assert security.ScryptHasher(11).needs_rehash(password_hash)
+
+    def test_legacy_md5(self):
+        password_hash = security.MD5Hasher(0).hash("cat")
+        assert security.check_password_hash(password_hash, "cat")
+        assert security.password_needs_rehash(password_hash)
+
+    def test_concurrency_limit(self):
+        with mock.patch.object(security, "_slots") as slots, \
+                mock.patch.object(settings, "password_hash_workers", 1):
+            slots.acquire.return_value = False
+            with self.assertRaises(errors.ServiceUnavailable):
+                security.generate_password_hash("cat")
+
+    def test_inline(self):
+        with mock.patch.object(settings, "password_hash_workers", 0), \
+                mock.patch.object(security, "_pool", None):
+            assert security.check_password_hash(security.generate_password_hash("cat"), "cat")
+            assert security._pool is None
+
+
+class TestRehash(BaseTestCase):
+    def test_rehash_on_login(self):
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.username == "bob").first()
+            user.password_hash = security.MD5Hasher(0).hash("cat")
+            db.commit()
+
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        assert resp.status_code == 201
+
+        with TestingSessionLocal() as db:
+            user = db.query(User).filter(User.username == "bob").first()
+            assert user.password_hash.startswith(f"{settings.password_hash_algorithm}$")
+
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        assert resp.status_code == 201
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
 from time import sleep
 
-from .base_test_case import set_connection, BaseTestCase
+from .base_test_case import set_connection, TestingSessionLocal, BaseTestCase
 from api.models import Token, User
 
 
@@ -34,3 +34,14 @@ class TestTokenModel(BaseTestCase):
             Token.clean(db)
             db.commit()
             assert db.query(Token).all() == []
+
+    def test_clean_in_batches(self):
+        with TestingSessionLocal() as db:
+            u = User(username="alice", email="alice@example.com", password="cat")
+            tokens = [u.generate_access_token() for _ in range(6)]
+            for t in tokens[:5]:
+                t.refresh_expiration = datetime.utcnow() - timedelta(days=2)
+            db.add_all([u, *tokens])
+            db.commit()
+            assert Token.clean(db, batch_size=2) == 5
+            assert db.query(Token).count() == 1
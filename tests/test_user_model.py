@@ -1,8 +1,8 @@
 import pytest
 from datetime import datetime
 
-from .base_test_case import set_connection, BaseTestCase
-from api.models import User
+from .base_test_case import set_connection, TestingSessionLocal, BaseTestCase
+from api.models import Post, User, followers
 
 
 class TestUserModel(BaseTestCase):
@@ -57,20 +57,49 @@ class TestUserModel(BaseTestCase):
             assert User.verify_refresh_token(t, db=db) == t 
 
     def test_follow(self):
-        u1 = User(username="alice", email="alice@example.com", password="cat")
-        u2 = User(username="charlie", email="charlie@example.com", password="cat")
-        u1.follow(u2)
-        assert u1.is_following(u2)
-        assert u2.is_followed_by(u1)
-        assert u2.is_following(u1) == False 
+        with TestingSessionLocal() as db:
+            u1 = User(username="alice", email="alice@example.com", password="cat")
+            u2 = User(username="charlie", email="charlie@example.com", password="cat")
+            db.add_all([u1, u2])
+            db.commit()
+            assert u1.follow(u2)
+            assert u1.follow(u2) == False
+            assert u1.is_following(u2)
+            assert u2.is_followed_by(u1)
+            assert u2.is_following(u1) == False 
+            assert u2.followers.all() == [u1]
+
+    def test_follow_from_two_sessions(self):
+        with TestingSessionLocal() as db:
+            db.add_all([User(username="alice", email="alice@example.com", password="cat"),
+                        User(username="charlie", email="charlie@example.com", password="cat")])
+            db.commit()
+
+        # Both requests loaded the users before either of them followed.
+        with TestingSessionLocal() as db1, TestingSessionLocal() as db2:
+            alice1, charlie1 = db1.query(User).filter(User.username.in_(["alice", "charlie"])).order_by(User.user_id)
+            alice2, charlie2 = db2.query(User).filter(User.username.in_(["alice", "charlie"])).order_by(User.user_id)
+            assert alice1.follow(charlie1)
+            db1.commit()
+            assert alice2.follow(charlie2) == False
+            db2.commit()
+
+        with TestingSessionLocal() as db:
+            assert db.query(followers).count() == 1
+            charlie = db.query(User).filter(User.username == "charlie").one()
+            assert charlie.followers_count == 1
 
     def test_unfollow(self):
-        u1 = User(username="alice", email="alice@example.com", password="cat")
-        u2 = User(username="charlie", email="charlie@example.com", password="cat")
-        u1.follow(u2)
-        u1.unfollow(u2)
-        assert u1.is_following(u2) == False
-        assert u2.is_followed_by(u1) == False
+        with TestingSessionLocal() as db:
+            u1 = User(username="alice", email="alice@example.com", password="cat")
+            u2 = User(username="charlie", email="charlie@example.com", password="cat")
+            db.add_all([u1, u2])
+            db.commit()
+            u1.follow(u2)
+            assert u1.unfollow(u2)
+            assert u1.unfollow(u2) == False
+            assert u1.is_following(u2) == False
+            assert u2.is_followed_by(u1) == False
 
     def test_validate_username(self):
         with set_connection() as db:
@@ -81,3 +110,19 @@ class TestUserModel(BaseTestCase):
         with set_connection() as db:
             assert User.validate_email("alice@example.com", db)
             assert User.validate_email("bob@example.com", db) == False
+
+    def test_reconcile_counters(self):
+        with TestingSessionLocal() as db:
+            u1 = User(username="alice", email="alice@example.com", password="cat")
+            u2 = User(username="charlie", email="charlie@example.com", password="cat")
+            db.add_all([u1, u2, Post(title="Title", content="Content", author=u1)])
+            db.commit()
+            u1.follow(u2)
+            db.query(User).update({"followers_count": 5, "posts_count": 0})
+            db.commit()
+
+            assert User.reconcile_counters(db, batch_size=1) == 3
+            assert User.reconcile_counters(db) == 0
+            assert [(u.followers_count, u.following_count, u.posts_count) for u in db.query(User).order_by(User.user_id)] == [
+                (0, 0, 0), (0, 1, 1), (1, 0, 0)
+            ]
@@ -80,3 +80,30 @@ class TestUsers(BaseTestCase):
         resp = self.client.put("/me", headers={"Authorization": f"Bearer {access_token}"}, json=new_user)
         assert resp.status_code == 400
 
+
+    def test_conditional_get(self):
+        resp = self.client.get("/users/bob")
+        assert resp.status_code == 200
+        etag = resp.headers["ETag"]
+
+        resp = self.client.get("/users/bob", headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["ETag"] == etag
+
+        resp = self.client.get("/users/bob", headers={"If-None-Match": '"other", W/' + etag})
+        assert resp.status_code == 304
+
+        resp = self.client.post("/tokens", data={"username": "bob", "password": "cat"})
+        access_token = resp.json()["access_token"]
+        resp = self.client.put("/me", headers={"Authorization": f"Bearer {access_token}"}, json={"about_me": "Hello"})
+        assert resp.status_code == 200
+
+        resp = self.client.get("/users/bob", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+        assert resp.json()["about_me"] == "Hello"
+
+        etag = resp.headers["ETag"]
+        resp = self.client.get("/me", headers={"Authorization": f"Bearer {access_token}", "If-None-Match": etag})
+        assert resp.status_code == 304